@@ -0,0 +1,76 @@
+import os
+import json
+import time
+import sqlite3
+from contextlib import closing
+from typing import Any, Optional
+
+# Location of the on-disk cache; can be overridden with the LLM_CACHE_PATH environment variable
+CACHE_PATH = os.environ.get("LLM_CACHE_PATH", "cache/llm_cache.db")
+
+# Default time-to-live for cached LLM responses (7 days)
+DEFAULT_TTL = 7 * 86400
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the cache database, creating it if needed."""
+    cache_dir = os.path.dirname(CACHE_PATH)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    conn = sqlite3.connect(CACHE_PATH, timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS llm_cache ("
+        "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+    )
+    return conn
+
+
+def get(key: str) -> Optional[Any]:
+    """
+    Get a cached value.
+
+    Args:
+        key: Cache key
+
+    Returns:
+        The cached value, or None if the key is missing or expired
+    """
+    try:
+        with closing(_connect()) as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, expires_at = row
+            if expires_at < time.time():
+                with conn:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+
+            return json.loads(value)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error reading LLM cache: {str(e)}")
+        return None
+
+
+def set(key: str, value: Any, ttl: int = DEFAULT_TTL):
+    """
+    Store a value in the cache.
+
+    Args:
+        key: Cache key
+        value: JSON-serializable value to store
+        ttl: Time-to-live in seconds
+    """
+    try:
+        with closing(_connect()) as conn:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), time.time() + ttl)
+                )
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        print(f"Error writing LLM cache: {str(e)}")
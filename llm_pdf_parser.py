@@ -1,17 +1,276 @@
 import os
 import re
+import asyncio
 import uuid
 import json
+import time
+import queue
+import hashlib
+import tempfile
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Any, Optional, Literal
+import pandas as pd
 import PyPDF2
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
+import llm_cache
+import text_cache
+from semantic_cache import get_semantic_cache
+
+# Prefer PyMuPDF (C MuPDF bindings) for text extraction, falling back to pure-Python PyPDF2
+try:
+    import fitz
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+# Use the in-process tesserocr bindings when available, otherwise shell out via pytesseract
+try:
+    from tesserocr import PyTessBaseAPI
+    HAS_TESSEROCR = True
+except ImportError:
+    HAS_TESSEROCR = False
+
+# Use the faster orjson parser for API responses when available
+# (orjson.JSONDecodeError is a subclass of json.JSONDecodeError, so error handling is unchanged)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Bump this whenever the prompt changes so stale cached LLM responses are not reused
+PROMPT_VERSION = "v1"
+
+# Pages whose text layer has fewer characters than this are treated as scanned and OCRed
+MIN_PAGE_CHARS = 50
+
+# Resolution used to rasterize pages for OCR. 150 DPI is enough for printed invoice text;
+# pass a higher ocr_dpi (e.g. 300) for noisy or low-quality scans
+OCR_DPI = 150
+
+# Maximum number of consecutive pages rasterized and OCRed together as one batch
+OCR_BATCH_PAGES = 4
+
+# Maximum number of rasterized batches waiting for OCR, which bounds the page images kept on disk
+OCR_QUEUE_SIZE = 4
+
+# Maximum number of text characters sent to each LLM provider in a single prompt
+MAX_PROMPT_CHARS = {
+    "google": 10000,
+    "openai": 8000  # OpenAI context limit is smaller
+}
+
+# Maximum number of concurrent LLM calls when a long document is split into chunks
+MAX_CONCURRENT_LLM_CALLS = 5
+
+def _compile_alternation(*patterns: str) -> "re.Pattern":
+    """
+    Fuse patterns that each have exactly one capture group into a single case-insensitive regex,
+    wrapping each pattern in a named group "p<priority>" so the text only has to be scanned once.
+    The alternation is a zero-width lookahead, so a long match can't hide an overlapping one.
+    """
+    alternation = "|".join(f"(?P<p{i}>{pattern})" for i, pattern in enumerate(patterns))
+    return re.compile(f"(?={alternation})", re.IGNORECASE)
+
+def _search_alternation(regex: "re.Pattern", text: str) -> Optional[str]:
+    """
+    Scan text once with a regex built by _compile_alternation and return the capture of the
+    highest-priority pattern that matched, i.e. the same result as trying each pattern in turn.
+    """
+    best_priority = None
+    best_value = None
+    for match in regex.finditer(text):
+        name = match.lastgroup
+        priority = int(name[1:])
+        if best_priority is None or priority < best_priority:
+            best_priority = priority
+            best_value = match.group(regex.groupindex[name] + 1)
+            if priority == 0:
+                break
+    return best_value
+
+# Regex patterns used for normalization and the fallback extractor, compiled once at import time
+_CURRENCY_RE = re.compile(r'[₹$,]')
+_GSTIN_RE = re.compile(r"([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})")
+_INVOICE_RE = _compile_alternation(
+    r"Invoice\s*No\.?\s*:?\s*([A-Za-z0-9/\-_]+)",
+    r"Document\s*No\s*:?\s*([A-Za-z0-9/\-_]+)",
+    r"(Mensa/[A-Z]{2}/[A-Z]{3}/\d+)"
+)
+_DATE_RE = _compile_alternation(
+    r"Invoice\s*Date\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})",
+    r"Date\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})",
+    r"Date\s*:\s*(\d{1,2}[A-Za-z]{3}\d{2,4})",
+    r"Date\s*of\s*Supply\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})"
+)
+# Not fused like the patterns above: a greedy "[^\n]+" capture could swallow a higher-priority match
+_BUYER_PATS = [re.compile(p, re.IGNORECASE) for p in (
+    r"(?:Buyer|Bill To|Customer|Ship To|Billed To)\s*:\s*([^\n]+)",
+    r"(?:Buyer|Bill To|Customer|Ship To|Billed To)\s*Name\s*:\s*([^\n]+)",
+    r"Details\s*of\s*Receiver\s*[^:]*:\s*([^\n]+)"
+)]
+_TOTAL_RE = _compile_alternation(
+    r"Total\s*Invoice\s*Value\s*(?:in\s*INR)?\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)",
+    r"Grand\s*Total\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)",
+    r"Total\s*Amount\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)",
+    r"Total\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)"
+)
+_LEGAL_NAME_RE = re.compile(r"Legal\s*Name\s*:?\s*([^\n]+)", re.IGNORECASE)
+_MYNTRA_RE = re.compile(r"(Myntra\s*Jabong\s*India\s*Pvt\s*Ltd)", re.IGNORECASE)
+_SUPPLIER_ADDRESS_RE = re.compile(r"(SVS\s*Warehouse[^\n]+(?:\n[^\n]+){1,3})")
+
+# Model used for each LLM provider
+GEMINI_MODEL = "gemini-1.0-pro"
+OPENAI_MODEL = "gpt-4"  # We can also use "gpt-3.5-turbo" for a cheaper alternative
+
+# Static parts of the extraction prompt. Providers cache repeated prompt prefixes (OpenAI does so
+# automatically), which only works if these stay byte-identical across requests; bump PROMPT_VERSION
+# whenever they change
+OPENAI_SYSTEM_PROMPT = "You are an expert at extracting structured data from invoice documents. Your task is to extract information and return it in a valid JSON format without any explanation or markdown."
+
+_PROMPT_INSTRUCTIONS = """
+Extract structured data from this invoice text. Return ONLY a valid JSON with two fields:
+1. "invoice_data": object with these fields: Document Type, Invoice Number, Invoice Date, Supplier Name, Supplier GSTIN, Supplier Address, Buyer Name, Buyer GSTIN, Buyer Address, Total Invoice Value
+2. "line_items": array of line items with fields: Line Number, Item/SKU Code, Item Description, Quantity, Unit Price, Tax Rate, Line Total Value
+
+INVOICE TEXT:
+"""
+
+# Reminder appended after the invoice text to return structured data
+_PROMPT_REMINDER = """
+
+IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
+{"invoice_data": {...}, "line_items": [...]}
+"""
+
+# Base URL of the OpenAI REST API
+OPENAI_API_URL = "https://api.openai.com/v1"
+
+# Seconds between status checks of a submitted OpenAI batch
+BATCH_POLL_INTERVAL = 30
+
+# Seconds to wait for a submitted OpenAI batch before giving up: the 24 hour completion window plus an hour
+BATCH_TIMEOUT = 25 * 3600
+
+# Seconds to wait for each HTTP request of the batch workflow
+BATCH_REQUEST_TIMEOUT = 120
+
+# Mapping of LLM response fields to normalized invoice fields
+_INVOICE_FIELD_MAP = {
+    "Document Type": "Document Type",
+    "Invoice Number": "Invoice/Document Number",
+    "Invoice Date": "Invoice/Document Date",
+    "Supplier Name": "Supplier Name",
+    "Supplier GSTIN": "Supplier GSTIN",
+    "Supplier Address": "Supplier Address",
+    "Buyer Name": "Buyer Name",
+    "Buyer GSTIN": "Buyer GSTIN",
+    "Buyer Address": "Buyer Address",
+    "Total Invoice Value": "Total Invoice Value"
+}
+_INVOICE_NUMERIC_FIELDS = (
+    "Total Quantity", "Subtotal/Taxable Value", "CGST Amount",
+    "SGST Amount", "IGST Amount", "CESS Amount",
+    "Additional Charges / Round Off", "Total Invoice Value"
+)
+
+# Mapping of LLM response line item fields to normalized line item fields
+_LINE_ITEM_FIELD_MAP = {
+    "Line Number": "Line #",
+    "Item/SKU Code": "Item/SKU Code",
+    "Item Description": "Item Description",
+    "HSN Code": "HSN Code",
+    "Quantity": "Quantity",
+    "Unit of Measurement": "UOM",
+    "Unit Price": "Unit Price",
+    "Discount": "Discount",
+    "Tax Rate": "Tax Rate",
+    "CGST Rate": "CGST Rate",
+    "SGST Rate": "SGST Rate",
+    "IGST Rate": "IGST Rate",
+    "CGST Amount": "CGST Amount",
+    "SGST Amount": "SGST Amount",
+    "IGST Amount": "IGST Amount",
+    "Line Total Value": "Line Total Value"
+}
+_LINE_ITEM_NUMERIC_FIELDS = (
+    "Quantity", "Unit Price", "Discount", "CGST Amount",
+    "SGST Amount", "IGST Amount", "Line Total Value"
+)
+
+def _strip_markdown_fences(text: str) -> str:
+    """Remove a leading ```json (or ```) and a trailing ``` markdown fence from an LLM response."""
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    elif text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+def _parse_openai_completion(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse the JSON returned in an OpenAI chat completion response body."""
+    # Extract the generated text from the response
+    if 'choices' in result and len(result['choices']) > 0:
+        message_content = result['choices'][0]['message']['content']
+        
+        # Try to parse the text as JSON
+        try:
+            # Remove any markdown code blocks if present
+            json_str = _strip_markdown_fences(message_content)
+            
+            # Debug the JSON string
+            print(f"Received JSON string of length {len(json_str)}")
+            print(f"First 100 chars: {json_str[:100]}...")
+            
+            return _json_loads(json_str)
+        except json.JSONDecodeError as e:
+            print(f"Error parsing JSON from OpenAI response: {str(e)}")
+            print(f"Raw text: {message_content[:200]}...")
+            return {"error": f"Failed to parse JSON from OpenAI response: {str(e)}"}
+    
+    print(f"Unexpected OpenAI response format")
+    return {"error": "Unexpected OpenAI response format"}
+
+_http_session = None
+
+def _get_http_session() -> requests.Session:
+    """
+    Get the HTTP session shared by all parsers, so LLM API calls reuse keep-alive connections.
+    Rate-limited (429) and server error responses are retried with exponential backoff.
+    """
+    global _http_session
+    if _http_session is None:
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False
+        )
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(max_retries=retry))
+        _http_session = session
+    return _http_session
+
+def init_shared_resources(use_semantic_cache: bool = False):
+    """
+    Create the process-wide resources shared by all parsers ahead of the first parse:
+    the HTTP session and, if enabled, the semantic cache with its embedding model.
+    """
+    _get_http_session()
+    if use_semantic_cache:
+        get_semantic_cache()
 
 class LLMPDFParser:
     """
-    PDF parser that uses PyPDF2 to extract text from PDFs and then uses LLM to extract structured data.
+    PDF parser that uses PyMuPDF or PyPDF2 to extract text from PDFs and then uses LLM to extract structured data.
     Falls back to pytesseract OCR for scanned documents if needed.
     Supports both Google Gemini and OpenAI APIs.
     """
@@ -21,12 +280,23 @@ class LLMPDFParser:
         pdf_path: str, 
         api_key: str = None, 
         llm_provider: Literal["google", "openai"] = "google",
-        openai_api_key: str = None
+        openai_api_key: str = None,
+        use_semantic_cache: bool = False,
+        ocr_dpi: int = OCR_DPI,
+        http_session: Optional[requests.Session] = None,
+        content_hash: Optional[str] = None
     ):
         self.pdf_path = pdf_path
         self.text = ""
+        self.pages = []
         self.serial_number = str(uuid.uuid4())
         self.llm_provider = llm_provider.lower()
+        self.use_semantic_cache = use_semantic_cache
+        self.ocr_dpi = ocr_dpi
+        # SHA-256 of the PDF contents used as the text cache key; computed from the file if not given
+        self.content_hash = content_hash
+        # Use the caller's HTTP session if given, otherwise the one shared by all parsers in the process
+        self._session = http_session or _get_http_session()
         
         # Set API keys based on provider
         if self.llm_provider == "google":
@@ -40,85 +310,235 @@ class LLMPDFParser:
         else:
             raise ValueError("Invalid LLM provider. Supported providers are 'google' and 'openai'.")
     
-    def _extract_text_with_pypdf(self) -> str:
-        """Extract text from PDF using PyPDF2."""
+    def _extract_pages_native(self) -> List[str]:
+        """Extract the text of each PDF page from its text layer, using PyMuPDF if installed, otherwise PyPDF2."""
+        if HAS_PYMUPDF:
+            try:
+                print(f"Extracting text from {self.pdf_path} using PyMuPDF...")
+                with fitz.open(self.pdf_path) as doc:
+                    pages = [page.get_text("text") for page in doc]
+                
+                print(f"Successfully extracted {sum(len(page) for page in pages)} characters of text with PyMuPDF")
+                return pages
+            except Exception as e:
+                print(f"Error in PyMuPDF extraction, falling back to PyPDF2: {str(e)}")
+        
         try:
             print(f"Extracting text from {self.pdf_path} using PyPDF2...")
-            text = ""
             with open(self.pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
+                # extract_text() can return None for empty pages
+                pages = [page.extract_text() or "" for page in pdf_reader.pages]
             
-            print(f"Successfully extracted {len(text)} characters of text with PyPDF2")
-            return text
+            print(f"Successfully extracted {sum(len(page) for page in pages)} characters of text with PyPDF2")
+            return pages
         except Exception as e:
             print(f"Error in PyPDF2 extraction: {str(e)}")
-            return ""
+            return []
     
-    def _extract_text_with_ocr(self) -> str:
-        """Extract text from PDF using pytesseract OCR."""
+    @staticmethod
+    def _ocr_image_batch(list_file: str, image_paths: List[str]) -> List[str]:
+        """
+        OCR a batch of page images, loading the tesseract language model once for the batch.
+        With tesserocr, a single in-process API instance is reused across the pages. Otherwise a single
+        tesseract process reads the image paths from a list file and separates pages with form feeds.
+        """
+        if HAS_TESSEROCR:
+            pages = []
+            with PyTessBaseAPI(lang="eng") as api:
+                for image_path in image_paths:
+                    api.SetImageFile(image_path)
+                    pages.append(api.GetUTF8Text())
+            return pages
+        
+        with open(list_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(image_paths) + "\n")
+        
+        output = pytesseract.image_to_string(list_file)
+        pages = output.split("\f")
+        # Drop the empty trailing chunk after the last page separator
+        if len(pages) > len(image_paths) and not pages[-1].strip():
+            pages = pages[:-1]
+        return pages
+    
+    def _extract_pages_with_ocr(self, page_numbers: Optional[List[int]] = None) -> List[str]:
+        """
+        Extract the text of PDF pages using pytesseract OCR.
+        If page_numbers (1-based) is given, only those pages are OCRed, otherwise the whole document.
+        A producer thread rasterizes small runs of pages with pdftoppm into a temporary directory and
+        hands them to the OCR workers through a bounded queue, so rasterizing the next pages overlaps
+        with OCR of the current ones and only a few page images exist at any time.
+        Note: on macOS, large PDFs may need a higher open file limit (e.g. `ulimit -n 10000`).
+        """
         try:
             print(f"Extracting text from {self.pdf_path} using pytesseract OCR...")
-            images = convert_from_path(self.pdf_path)
-            text = ""
+            if page_numbers is None:
+                page_numbers = range(1, pdfinfo_from_path(self.pdf_path)["Pages"] + 1)
+            
+            # Group the pages into runs of consecutive pages, each rasterized with one pdftoppm call
+            # and OCRed as one batch so tesseract loads the language model once per batch
+            page_ranges = []
+            for page_number in sorted(page_numbers):
+                if (page_ranges and page_number == page_ranges[-1][1] + 1
+                        and page_ranges[-1][1] - page_ranges[-1][0] + 1 < OCR_BATCH_PAGES):
+                    page_ranges[-1][1] = page_number
+                else:
+                    page_ranges.append([page_number, page_number])
+            if not page_ranges:
+                return []
             
-            for i, image in enumerate(images):
-                print(f"Processing page {i+1}/{len(images)}...")
-                page_text = pytesseract.image_to_string(image)
-                text += page_text + "\n"
+            # tesseract runs as a subprocess, so batches can be OCRed concurrently from threads.
+            # Applications should set OMP_THREAD_LIMIT=1 at startup (as main.py's workers do) so the
+            # concurrent tesseract processes don't oversubscribe the cores.
+            workers = min(8, os.cpu_count() or 1, len(page_ranges))
+            batch_texts = [[] for _ in page_ranges]
+            errors = []
+            
+            with tempfile.TemporaryDirectory() as temp_dir:
+                batch_queue = queue.Queue(maxsize=OCR_QUEUE_SIZE)
+                
+                def rasterize():
+                    try:
+                        for index, (first_page, last_page) in enumerate(page_ranges):
+                            image_paths = convert_from_path(
+                                self.pdf_path,
+                                first_page=first_page,
+                                last_page=last_page,
+                                dpi=self.ocr_dpi,
+                                thread_count=last_page - first_page + 1,
+                                output_folder=temp_dir,
+                                output_file=f"page_{first_page}_",
+                                # Render grayscale pages, tesseract doesn't use the color planes
+                                grayscale=True,
+                                fmt="jpeg",
+                                paths_only=True
+                            )
+                            batch_queue.put((index, image_paths))
+                    finally:
+                        # Tell every OCR worker there are no more batches
+                        for _ in range(workers):
+                            batch_queue.put(None)
+                
+                def ocr_worker():
+                    while True:
+                        item = batch_queue.get()
+                        if item is None:
+                            return
+                        index, image_paths = item
+                        # Keep consuming after a failed batch so the producer never blocks on a full queue
+                        try:
+                            list_file = os.path.join(temp_dir, f"batch_{index}.txt")
+                            batch_texts[index] = self._ocr_image_batch(list_file, image_paths)
+                        except Exception as e:
+                            errors.append(e)
+                        finally:
+                            # Free the disk space of the OCRed page images; a failed removal must not
+                            # stop this worker, the temporary directory is deleted afterwards anyway
+                            for image_path in image_paths:
+                                try:
+                                    os.remove(image_path)
+                                except OSError:
+                                    pass
+                
+                print(f"Processing {len(page_numbers)} pages in {len(page_ranges)} batches...")
+                with ThreadPoolExecutor(max_workers=workers + 1) as executor:
+                    producer = executor.submit(rasterize)
+                    consumers = [executor.submit(ocr_worker) for _ in range(workers)]
+                    producer.result()
+                    for consumer in consumers:
+                        consumer.result()
+                if errors:
+                    raise errors[0]
             
-            print(f"Successfully extracted {len(text)} characters of text with OCR")
-            return text
+            page_texts = [page for pages in batch_texts for page in pages]
+            print(f"Successfully extracted {sum(len(page) for page in page_texts)} characters of text with OCR")
+            return page_texts
         except Exception as e:
             print(f"Error in OCR extraction: {str(e)}")
-            return ""
+            return []
     
     def extract_text(self) -> str:
         """
-        Extract text from PDF using PyPDF2, falling back to OCR if needed.
+        Extract text from PDF using PyMuPDF or PyPDF2, falling back to OCR for pages without a text layer.
+        Extracted pages are cached by file path, modification time, size and OCR resolution.
         """
-        # First try PyPDF2
-        text = self._extract_text_with_pypdf()
-        
-        # If PyPDF2 failed or didn't extract enough text, try OCR
-        if len(text.strip()) < 100:
-            print("Not enough text extracted with PyPDF2, trying OCR...")
-            ocr_text = self._extract_text_with_ocr()
-            if len(ocr_text.strip()) > len(text.strip()):
-                text = ocr_text
-        
-        self.text = text
-        return text
+        cache_variant = f"ocr_dpi={self.ocr_dpi}"
+        pages = text_cache.get(self.pdf_path, cache_variant, self.content_hash)
+        if pages is not None:
+            print(f"Using cached text for {self.pdf_path}")
+        else:
+            # First try the PDF text layer
+            pages = self._extract_pages_native()
+            
+            # Don't cache text of scanned pages whose OCR failed, so the next parse retries it
+            ocr_complete = True
+            
+            if not pages:
+                # Text extraction failed entirely, OCR the whole document
+                print("No text extracted from the PDF text layer, trying OCR...")
+                pages = self._extract_pages_with_ocr()
+            else:
+                # Only OCR the pages that have (almost) no text layer, e.g. scanned pages in a hybrid PDF
+                scanned_pages = [i + 1 for i, page in enumerate(pages) if len(page.strip()) < MIN_PAGE_CHARS]
+                if scanned_pages:
+                    print(f"Not enough text extracted from {len(scanned_pages)} of {len(pages)} pages, trying OCR...")
+                    ocr_pages = self._extract_pages_with_ocr(scanned_pages)
+                    ocr_complete = len(ocr_pages) == len(scanned_pages)
+                    if ocr_complete:
+                        for page_number, ocr_page in zip(scanned_pages, ocr_pages):
+                            if len(ocr_page.strip()) > len(pages[page_number - 1].strip()):
+                                pages[page_number - 1] = ocr_page
+            
+            if pages and ocr_complete:
+                text_cache.set(self.pdf_path, pages, cache_variant, self.content_hash)
+        
+        self.pages = pages
+        self.text = "\n".join(pages)
+        return self.text
     
-    def _generate_llm_prompt(self) -> str:
+    def _split_text_into_chunks(self, max_chars: int) -> List[str]:
+        """Split the text into chunks of at most max_chars, keeping pages together where possible."""
+        chunks = []
+        current = ""
+        for page in self.pages or [self.text]:
+            # Split pages that don't fit in a single chunk on line boundaries
+            while len(page) > max_chars:
+                cut = page.rfind("\n", 0, max_chars)
+                if cut <= 0:
+                    cut = max_chars
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(page[:cut])
+                page = page[cut:].lstrip("\n")
+            
+            if current and len(current) + len(page) + 1 > max_chars:
+                chunks.append(current)
+                current = page
+            else:
+                current = f"{current}\n{page}" if current else page
+        
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    def _generate_llm_prompt(self, text: str = None) -> str:
         """Generate a concise prompt for the LLM to extract structured invoice data."""
         # Truncate text if it's too long for the API
-        text_to_use = self.text
-        max_chars = 10000 if self.llm_provider == "google" else 8000  # OpenAI context limit is smaller
+        text_to_use = self.text if text is None else text
+        max_chars = MAX_PROMPT_CHARS[self.llm_provider]
         if len(text_to_use) > max_chars:
             print(f"Text too long ({len(text_to_use)} chars), truncating to {max_chars} chars")
             text_to_use = text_to_use[:max_chars]
         
-        prompt = """
-Extract structured data from this invoice text. Return ONLY a valid JSON with two fields:
-1. "invoice_data": object with these fields: Document Type, Invoice Number, Invoice Date, Supplier Name, Supplier GSTIN, Supplier Address, Buyer Name, Buyer GSTIN, Buyer Address, Total Invoice Value
-2. "line_items": array of line items with fields: Line Number, Item/SKU Code, Item Description, Quantity, Unit Price, Tax Rate, Line Total Value
-
-INVOICE TEXT:
-"""
-        # Add extracted text to the prompt
-        prompt += text_to_use
-        
-        # Add a reminder to return structured data
-        prompt += """
-
-IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
-{"invoice_data": {...}, "line_items": [...]}
-"""
-        
-        return prompt
+        # Static instructions first and the invoice text after them, so every request shares the same prefix
+        return _PROMPT_INSTRUCTIONS + text_to_use + _PROMPT_REMINDER
+    
+    def _cache_key(self) -> str:
+        """Build the LLM response cache key from the prompt version, model and extracted text."""
+        model_id = GEMINI_MODEL if self.llm_provider == "google" else OPENAI_MODEL
+        payload = f"{PROMPT_VERSION}|{self.llm_provider}|{model_id}|{self.text}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
     
     def _call_llm_api(self, prompt: str) -> Dict[str, Any]:
         """Call the appropriate LLM API based on the provider."""
@@ -129,9 +549,40 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
         else:
             return {"error": f"Unsupported LLM provider: {self.llm_provider}"}
     
+    def _call_llm_api_sharded(self) -> Dict[str, Any]:
+        """
+        Call the LLM concurrently on page-aligned chunks of a document that is too long for one prompt,
+        and merge the results. Invoice-level data is taken from the first chunk (the header is on the
+        first page) and line items are concatenated in page order.
+        """
+        chunks = self._split_text_into_chunks(MAX_PROMPT_CHARS[self.llm_provider])
+        print(f"Text too long ({len(self.text)} chars), splitting into {len(chunks)} chunks")
+        prompts = [self._generate_llm_prompt(chunk) for chunk in chunks]
+        
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_LLM_CALLS, len(prompts))) as executor:
+            responses = list(executor.map(self._call_llm_api, prompts))
+        
+        if "error" in responses[0]:
+            return responses[0]
+        
+        merged = {"invoice_data": responses[0].get("invoice_data", {}), "line_items": []}
+        for i, response in enumerate(responses):
+            if "error" in response:
+                # Keep the items from the other chunks, but don't cache the incomplete result
+                print(f"LLM API error for chunk {i+1}/{len(responses)}: {response['error']}")
+                merged["incomplete"] = True
+                continue
+            merged["line_items"].extend(item for item in response.get("line_items", []) if isinstance(item, dict))
+        
+        # Line numbers restart in every chunk, so renumber the merged items
+        for line_number, item in enumerate(merged["line_items"], start=1):
+            item["Line Number"] = line_number
+        
+        return merged
+    
     def _call_google_gemini_api(self, prompt: str) -> Dict[str, Any]:
         """Call the Google Gemini API to extract structured data from the text."""
-        url = "https://generativelanguage.googleapis.com/v1/models/gemini-1.0-pro:generateContent"
+        url = f"https://generativelanguage.googleapis.com/v1/models/{GEMINI_MODEL}:generateContent"
         headers = {
             "Content-Type": "application/json",
         }
@@ -162,7 +613,7 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
             # Print prompt length for debugging
             print(f"Sending prompt with {len(prompt)} characters to Google Gemini API")
             
-            response = requests.post(url, headers=headers, params=params, json=data)
+            response = self._session.post(url, headers=headers, params=params, json=data)
             
             # Debug the response
             print(f"API response status code: {response.status_code}")
@@ -171,7 +622,7 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
                 print(f"Error response: {response.text}")
                 return {"error": f"API error: {response.status_code} - {response.text}"}
             
-            result = response.json()
+            result = _json_loads(response.content)
             
             # Extract the generated text from the response
             if 'candidates' in result and len(result['candidates']) > 0:
@@ -181,17 +632,14 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
                         if 'text' in part:
                             # Try to parse the text as JSON
                             try:
-                                json_str = part['text']
                                 # Remove leading and trailing markdown if present
-                                json_str = re.sub(r'^```json', '', json_str)
-                                json_str = re.sub(r'```$', '', json_str)
-                                json_str = json_str.strip()
+                                json_str = _strip_markdown_fences(part['text'])
                                 
                                 # Debug the JSON string
                                 print(f"Received JSON string of length {len(json_str)}")
                                 print(f"First 100 chars: {json_str[:100]}...")
                                 
-                                return json.loads(json_str)
+                                return _json_loads(json_str)
                             except json.JSONDecodeError as e:
                                 print(f"Error parsing JSON from API response: {str(e)}")
                                 print(f"Raw text: {json_str[:200]}...")
@@ -208,20 +656,14 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
             print(f"Unexpected error: {str(e)}")
             return {"error": f"Unexpected error: {str(e)}"}
     
-    def _call_openai_api(self, prompt: str) -> Dict[str, Any]:
-        """Call the OpenAI API to extract structured data from the text."""
-        url = "https://api.openai.com/v1/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        data = {
-            "model": "gpt-4",  # We can also use "gpt-3.5-turbo" for a cheaper alternative
+    def _openai_request_body(self, prompt: str) -> Dict[str, Any]:
+        """Build the OpenAI chat completion request body for a prompt."""
+        return {
+            "model": OPENAI_MODEL,
             "messages": [
                 {
                     "role": "system",
-                    "content": "You are an expert at extracting structured data from invoice documents. Your task is to extract information and return it in a valid JSON format without any explanation or markdown."
+                    "content": OPENAI_SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -231,12 +673,22 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
             "temperature": 0.0,
             "max_tokens": 4000
         }
+    
+    def _call_openai_api(self, prompt: str) -> Dict[str, Any]:
+        """Call the OpenAI API to extract structured data from the text."""
+        url = f"{OPENAI_API_URL}/chat/completions"
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+        
+        data = self._openai_request_body(prompt)
         
         try:
             # Print prompt length for debugging
             print(f"Sending prompt with {len(prompt)} characters to OpenAI API")
             
-            response = requests.post(url, headers=headers, json=data)
+            response = self._session.post(url, headers=headers, json=data)
             
             # Debug the response
             print(f"API response status code: {response.status_code}")
@@ -245,32 +697,7 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
                 print(f"Error response: {response.text}")
                 return {"error": f"API error: {response.status_code} - {response.text}"}
             
-            result = response.json()
-            
-            # Extract the generated text from the response
-            if 'choices' in result and len(result['choices']) > 0:
-                message_content = result['choices'][0]['message']['content']
-                
-                # Try to parse the text as JSON
-                try:
-                    # Remove any markdown code blocks if present
-                    json_str = re.sub(r'^```json', '', message_content)
-                    json_str = re.sub(r'^```', '', json_str)
-                    json_str = re.sub(r'```$', '', json_str)
-                    json_str = json_str.strip()
-                    
-                    # Debug the JSON string
-                    print(f"Received JSON string of length {len(json_str)}")
-                    print(f"First 100 chars: {json_str[:100]}...")
-                    
-                    return json.loads(json_str)
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing JSON from OpenAI response: {str(e)}")
-                    print(f"Raw text: {message_content[:200]}...")
-                    return {"error": f"Failed to parse JSON from OpenAI response: {str(e)}"}
-            
-            print(f"Unexpected OpenAI response format")
-            return {"error": "Unexpected OpenAI response format"}
+            return _parse_openai_completion(_json_loads(response.content))
             
         except requests.exceptions.RequestException as e:
             print(f"OpenAI API request failed: {str(e)}")
@@ -324,34 +751,19 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
         try:
             invoice_data = llm_response.get("invoice_data", {})
             
-            # Map the fields from the LLM response
-            field_mapping = {
-                "Document Type": "Document Type",
-                "Invoice Number": "Invoice/Document Number",
-                "Invoice Date": "Invoice/Document Date",
-                "Supplier Name": "Supplier Name",
-                "Supplier GSTIN": "Supplier GSTIN",
-                "Supplier Address": "Supplier Address",
-                "Buyer Name": "Buyer Name",
-                "Buyer GSTIN": "Buyer GSTIN",
-                "Buyer Address": "Buyer Address",
-                "Total Invoice Value": "Total Invoice Value"
-            }
-            
             # Update normalized data with values from the LLM response
-            for llm_field, norm_field in field_mapping.items():
-                if llm_field in invoice_data:
-                    normalized_data[norm_field] = invoice_data[llm_field]
+            normalized_data.update({
+                norm_field: invoice_data[llm_field]
+                for llm_field, norm_field in _INVOICE_FIELD_MAP.items() if llm_field in invoice_data
+            })
             
             # Convert numeric values to float
-            for key in ["Total Quantity", "Subtotal/Taxable Value", "CGST Amount", 
-                        "SGST Amount", "IGST Amount", "CESS Amount", 
-                        "Additional Charges / Round Off", "Total Invoice Value"]:
+            for key in _INVOICE_NUMERIC_FIELDS:
                 try:
                     if normalized_data[key] and normalized_data[key] != "":
                         # Remove any currency symbols or commas
                         if isinstance(normalized_data[key], str):
-                            normalized_data[key] = re.sub(r'[₹$,]', '', normalized_data[key])
+                            normalized_data[key] = _CURRENCY_RE.sub('', normalized_data[key])
                         normalized_data[key] = float(normalized_data[key])
                 except (ValueError, TypeError):
                     normalized_data[key] = 0.0
@@ -400,51 +812,65 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
                     "Line Total Value": 0.0
                 }
                 
-                # Map the fields from the LLM response
-                field_mapping = {
-                    "Line Number": "Line #",
-                    "Item/SKU Code": "Item/SKU Code",
-                    "Item Description": "Item Description",
-                    "HSN Code": "HSN Code",
-                    "Quantity": "Quantity",
-                    "Unit of Measurement": "UOM",
-                    "Unit Price": "Unit Price",
-                    "Discount": "Discount",
-                    "Tax Rate": "Tax Rate",
-                    "CGST Rate": "CGST Rate",
-                    "SGST Rate": "SGST Rate",
-                    "IGST Rate": "IGST Rate",
-                    "CGST Amount": "CGST Amount",
-                    "SGST Amount": "SGST Amount",
-                    "IGST Amount": "IGST Amount",
-                    "Line Total Value": "Line Total Value"
-                }
-                
                 # Update normalized item with values from the LLM response
-                for llm_field, norm_field in field_mapping.items():
-                    if llm_field in item:
-                        normalized_item[norm_field] = item[llm_field]
-                
-                # Convert numeric values to float
-                for key in ["Quantity", "Unit Price", "Discount", "CGST Amount", 
-                            "SGST Amount", "IGST Amount", "Line Total Value"]:
-                    try:
-                        if normalized_item[key] and normalized_item[key] != "":
-                            # Remove any currency symbols or commas
-                            if isinstance(normalized_item[key], str):
-                                normalized_item[key] = re.sub(r'[₹$,]', '', normalized_item[key])
-                            normalized_item[key] = float(normalized_item[key])
-                    except (ValueError, TypeError):
-                        normalized_item[key] = 0.0
+                normalized_item.update({
+                    norm_field: item[llm_field]
+                    for llm_field, norm_field in _LINE_ITEM_FIELD_MAP.items() if llm_field in item
+                })
                 
                 normalized_items.append(normalized_item)
             
-            return normalized_items
+            if not normalized_items:
+                return []
+            
+            # Convert numeric columns to float in one vectorized pass over all rows,
+            # removing currency symbols and commas; values that don't parse become 0.0
+            df = pd.DataFrame(normalized_items)
+            for key in _LINE_ITEM_NUMERIC_FIELDS:
+                df[key] = pd.to_numeric(
+                    df[key].astype(str).str.replace(_CURRENCY_RE, '', regex=True),
+                    errors='coerce'
+                ).fillna(0.0).astype(float)
+            
+            return df.to_dict(orient='records')
             
         except Exception as e:
             print(f"Error normalizing line items: {str(e)}")
             return []
     
+    def _extract_invoice_number_from_text(self) -> str:
+        """Extract the invoice number from the text using regex patterns."""
+        invoice_number = _search_alternation(_INVOICE_RE, self.text)
+        return invoice_number.strip() if invoice_number else ""
+    
+    def _extract_invoice_date_from_text(self) -> str:
+        """Extract the invoice date from the text using regex patterns."""
+        invoice_date = _search_alternation(_DATE_RE, self.text)
+        return invoice_date.strip() if invoice_date else ""
+    
+    def _lookup_semantic_cache(self) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached LLM response for a near-identical invoice.
+        On a hit, the fields that typically differ between such invoices are refreshed from the text.
+        """
+        semantic_cache = get_semantic_cache()
+        if semantic_cache is None:
+            return None
+        
+        cached = semantic_cache.lookup(self.text)
+        if cached is None:
+            return None
+        
+        llm_response = json.loads(json.dumps(cached))  # Deep copy so the cached template is not modified
+        invoice_data = llm_response.setdefault("invoice_data", {})
+        invoice_number = self._extract_invoice_number_from_text()
+        invoice_date = self._extract_invoice_date_from_text()
+        if invoice_number:
+            invoice_data["Invoice Number"] = invoice_number
+        if invoice_date:
+            invoice_data["Invoice Date"] = invoice_date
+        return llm_response
+    
     def _extract_basic_info_from_text(self) -> Dict[str, Any]:
         """
         Fallback method to extract basic information from text using regex patterns.
@@ -472,30 +898,9 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
         elif "delivery challan" in self.text.lower():
             basic_info["Document Type"] = "Delivery Challan"
         
-        # Extract invoice number
-        invoice_patterns = [
-            r"Invoice\s*No\.?\s*:?\s*([A-Za-z0-9/\-_]+)",
-            r"Document\s*No\s*:?\s*([A-Za-z0-9/\-_]+)",
-            r"(Mensa/[A-Z]{2}/[A-Z]{3}/\d+)"
-        ]
-        for pattern in invoice_patterns:
-            match = re.search(pattern, self.text, re.IGNORECASE)
-            if match:
-                basic_info["Invoice/Document Number"] = match.group(1).strip()
-                break
-        
-        # Extract date
-        date_patterns = [
-            r"Invoice\s*Date\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})",
-            r"Date\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})",
-            r"Date\s*:\s*(\d{1,2}[A-Za-z]{3}\d{2,4})",
-            r"Date\s*of\s*Supply\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})"
-        ]
-        for pattern in date_patterns:
-            match = re.search(pattern, self.text, re.IGNORECASE)
-            if match:
-                basic_info["Invoice/Document Date"] = match.group(1).strip()
-                break
+        # Extract invoice number and date
+        basic_info["Invoice/Document Number"] = self._extract_invoice_number_from_text()
+        basic_info["Invoice/Document Date"] = self._extract_invoice_date_from_text()
         
         # Extract company names
         # First few lines often contain the supplier name
@@ -507,19 +912,14 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
                     break
         
         # Look for buyer/customer name - improved patterns
-        buyer_patterns = [
-            r"(?:Buyer|Bill To|Customer|Ship To|Billed To)\s*:\s*([^\n]+)",
-            r"(?:Buyer|Bill To|Customer|Ship To|Billed To)\s*Name\s*:\s*([^\n]+)",
-            r"Details\s*of\s*Receiver\s*[^:]*:\s*([^\n]+)"
-        ]
-        for pattern in buyer_patterns:
-            match = re.search(pattern, self.text, re.IGNORECASE)
+        for pattern in _BUYER_PATS:
+            match = pattern.search(self.text)
             if match:
                 basic_info["Buyer Name"] = match.group(1).strip()
                 break
         
         # Look for buyer info followed by legal name
-        legal_name_match = re.search(r"Legal\s*Name\s*:?\s*([^\n]+)", self.text, re.IGNORECASE)
+        legal_name_match = _LEGAL_NAME_RE.search(self.text)
         if legal_name_match:
             basic_info["Buyer Name"] = legal_name_match.group(1).strip()
         
@@ -536,40 +936,30 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
                     break
         
         # Look specifically for "Myntra Jabong India Pvt Ltd" which is in this invoice
-        myntra_match = re.search(r"(Myntra\s*Jabong\s*India\s*Pvt\s*Ltd)", self.text, re.IGNORECASE)
+        myntra_match = _MYNTRA_RE.search(self.text)
         if myntra_match:
             basic_info["Buyer Name"] = myntra_match.group(1).strip()
         
         # Extract GSTIN
-        gstin_pattern = r"([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})"
-        gstin_matches = re.findall(gstin_pattern, self.text)
+        gstin_matches = _GSTIN_RE.findall(self.text)
         if len(gstin_matches) >= 1:
             basic_info["Supplier GSTIN"] = gstin_matches[0]
         if len(gstin_matches) >= 2:
             basic_info["Buyer GSTIN"] = gstin_matches[1]
         
         # Extract addresses - add more patterns
-        supplier_address_match = re.search(r"(SVS\s*Warehouse[^\n]+(?:\n[^\n]+){1,3})", self.text)
+        supplier_address_match = _SUPPLIER_ADDRESS_RE.search(self.text)
         if supplier_address_match:
             address = supplier_address_match.group(1).replace('\n', ' ')
             basic_info["Supplier Address"] = address.strip()
         
         # Extract total value
-        total_patterns = [
-            r"Total\s*Invoice\s*Value\s*(?:in\s*INR)?\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)",
-            r"Grand\s*Total\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)",
-            r"Total\s*Amount\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)",
-            r"Total\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)"
-        ]
-        for pattern in total_patterns:
-            match = re.search(pattern, self.text, re.IGNORECASE)
-            if match:
-                value_str = match.group(1).replace(',', '')
-                try:
-                    basic_info["Total Invoice Value"] = float(value_str)
-                except ValueError:
-                    pass
-                break
+        total_value = _search_alternation(_TOTAL_RE, self.text)
+        if total_value:
+            try:
+                basic_info["Total Invoice Value"] = float(total_value.replace(',', ''))
+            except ValueError:
+                pass
         
         return basic_info
     
@@ -595,13 +985,44 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
         print(f"Successfully extracted {len(self.text)} characters of text")
         print(f"First 200 characters: {self.text[:200]}")
         
-        # Generate prompt for the LLM
-        prompt = self._generate_llm_prompt()
+        # Reuse a cached LLM response for identical text (temperature is 0, so responses are deterministic)
+        cache_key = self._cache_key()
+        llm_response = llm_cache.get(cache_key)
+        if llm_response is not None:
+            print(f"Using cached {self.llm_provider.capitalize()} response")
         
-        # Call the selected LLM API
-        print(f"Calling {self.llm_provider.capitalize()} API to extract structured data...")
-        llm_response = self._call_llm_api(prompt)
+        # Otherwise reuse the response of a near-identical invoice, if enabled
+        if llm_response is None and self.use_semantic_cache:
+            llm_response = self._lookup_semantic_cache()
+            if llm_response is not None:
+                print(f"Using {self.llm_provider.capitalize()} response cached for a near-identical invoice")
         
+        if llm_response is None:
+            print(f"Calling {self.llm_provider.capitalize()} API to extract structured data...")
+            if len(self.text) > MAX_PROMPT_CHARS[self.llm_provider]:
+                # Long documents are split into chunks that are sent concurrently instead of being truncated
+                llm_response = self._call_llm_api_sharded()
+            else:
+                # Generate prompt for the LLM
+                prompt = self._generate_llm_prompt()
+                
+                # Call the selected LLM API
+                llm_response = self._call_llm_api(prompt)
+            
+            if "error" not in llm_response and not llm_response.get("incomplete"):
+                llm_cache.set(cache_key, llm_response)
+                if self.use_semantic_cache:
+                    semantic_cache = get_semantic_cache()
+                    if semantic_cache is not None:
+                        semantic_cache.add(self.text, llm_response)
+        
+        return self._build_results(llm_response)
+    
+    def _build_results(self, llm_response: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Turn an LLM response into the (invoice_data, item_data) tuple returned by parse(),
+        falling back to regex extraction if the response is an error.
+        """
         # Check for API error
         if "error" in llm_response:
             print(f"LLM API error: {llm_response['error']}")
@@ -615,4 +1036,177 @@ IMPORTANT: Return ONLY valid JSON without any explanation or markdown. Format:
         invoice_data = self._normalize_invoice_data(llm_response)
         item_data = self._normalize_line_items(llm_response)
         
-        return invoice_data, item_data 
\ No newline at end of file
+        return invoice_data, item_data
+
+
+async def parse_many(
+    pdf_paths: List[str],
+    max_concurrent_llm_calls: int = MAX_CONCURRENT_LLM_CALLS,
+    **parser_kwargs
+) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Parse several PDFs, overlapping text extraction of one document with the LLM calls of others.
+    
+    Args:
+        pdf_paths: Paths to the PDF files
+        max_concurrent_llm_calls: Maximum number of documents sent to the LLM at the same time
+        **parser_kwargs: Keyword arguments passed to each LLMPDFParser (api_key, llm_provider, ...)
+        
+    Returns:
+        List of (invoice_data, item_data) tuples in the same order as pdf_paths
+    """
+    loop = asyncio.get_running_loop()
+    llm_semaphore = asyncio.Semaphore(max_concurrent_llm_calls)
+    
+    # Extraction (PyMuPDF/PyPDF2/OCR) is CPU-bound, so it gets its own small pool, while the
+    # network-bound LLM calls run on the default executor, limited by the semaphore
+    with ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1)) as extract_executor:
+        async def parse_one(pdf_path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+            parser = LLMPDFParser(pdf_path, **parser_kwargs)
+            await loop.run_in_executor(extract_executor, parser.extract_text)
+            async with llm_semaphore:
+                return await loop.run_in_executor(None, parser.parse)
+        
+        return await asyncio.gather(*(parse_one(pdf_path) for pdf_path in pdf_paths))
+
+
+def _run_openai_batch(
+    request_lines: List[str],
+    api_key: str,
+    poll_interval: float,
+    timeout: float = BATCH_TIMEOUT
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run chat completion requests through the OpenAI Batch API and wait for the results.
+    
+    Args:
+        request_lines: JSONL lines, one request each, with a unique custom_id
+        api_key: OpenAI API key
+        poll_interval: Seconds between status checks of the batch
+        timeout: Seconds to wait for the batch to finish before cancelling it
+        
+    Returns:
+        Parsed LLM response (or error) for each custom_id in the batch output
+    """
+    session = _get_http_session()
+    headers = {"Authorization": f"Bearer {api_key}"}
+    
+    try:
+        # Upload the requests as a JSONL file and start the batch
+        upload = session.post(
+            f"{OPENAI_API_URL}/files",
+            headers=headers,
+            data={"purpose": "batch"},
+            files={"file": ("batch.jsonl", "\n".join(request_lines).encode("utf-8"))},
+            timeout=BATCH_REQUEST_TIMEOUT
+        )
+        upload.raise_for_status()
+        
+        response = session.post(
+            f"{OPENAI_API_URL}/batches",
+            headers=headers,
+            json={
+                "input_file_id": upload.json()["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h"
+            },
+            timeout=BATCH_REQUEST_TIMEOUT
+        )
+        response.raise_for_status()
+        batch = response.json()
+        print(f"Submitted OpenAI batch {batch['id']} with {len(request_lines)} requests")
+        
+        deadline = time.monotonic() + timeout
+        while batch["status"] not in ("completed", "failed", "expired", "cancelled"):
+            if time.monotonic() >= deadline:
+                print(f"OpenAI batch {batch['id']} not finished after {timeout} seconds, cancelling it")
+                session.post(f"{OPENAI_API_URL}/batches/{batch['id']}/cancel", headers=headers,
+                             timeout=BATCH_REQUEST_TIMEOUT)
+                return {}
+            time.sleep(poll_interval)
+            response = session.get(f"{OPENAI_API_URL}/batches/{batch['id']}", headers=headers,
+                                   timeout=BATCH_REQUEST_TIMEOUT)
+            response.raise_for_status()
+            batch = response.json()
+            print(f"OpenAI batch {batch['id']} status: {batch['status']}")
+        
+        if not batch.get("output_file_id"):
+            print(f"OpenAI batch {batch['id']} ended with status {batch['status']} and no output")
+            return {}
+        
+        response = session.get(f"{OPENAI_API_URL}/files/{batch['output_file_id']}/content", headers=headers,
+                               timeout=BATCH_REQUEST_TIMEOUT)
+        response.raise_for_status()
+    except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+        print(f"OpenAI batch request failed: {str(e)}")
+        return {}
+    
+    # Parse each output line on its own, so a malformed entry only fails its own invoice; invoices
+    # without a parsed entry are reported as missing from the output by the caller
+    responses = {}
+    for line in response.text.splitlines():
+        if not line.strip():
+            continue
+        custom_id = None
+        try:
+            entry = _json_loads(line)
+            custom_id = entry["custom_id"]
+            result = entry.get("response") or {}
+            if result.get("status_code") != 200:
+                responses[custom_id] = {"error": f"API error: {result.get('status_code')} - {entry.get('error') or result.get('body')}"}
+            else:
+                responses[custom_id] = _parse_openai_completion(result["body"])
+        except Exception as e:
+            print(f"Error reading OpenAI batch output entry {custom_id}: {str(e)}")
+            if custom_id is not None:
+                responses[custom_id] = {"error": f"Invalid OpenAI batch output entry: {str(e)}"}
+    return responses
+
+
+def submit_batch(
+    pdf_paths: List[str],
+    openai_api_key: str = None,
+    poll_interval: float = BATCH_POLL_INTERVAL
+) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Parse several PDFs with a single OpenAI Batch API job instead of one chat completion per PDF.
+    Batches cost half as much but can take up to 24 hours, so this suits latency-insensitive reprocessing.
+    Documents with a cached response, without text, or too long for a single prompt are parsed as usual.
+    
+    Args:
+        pdf_paths: Paths to the PDF files
+        openai_api_key: OpenAI API key. If None, uses the OPENAI_API_KEY environment variable.
+        poll_interval: Seconds between status checks of the batch
+        
+    Returns:
+        List of (invoice_data, item_data) tuples in the same order as pdf_paths
+    """
+    parsers = [LLMPDFParser(pdf_path, llm_provider="openai", openai_api_key=openai_api_key) for pdf_path in pdf_paths]
+    results = [None] * len(parsers)
+    request_lines = []
+    
+    for i, parser in enumerate(parsers):
+        parser.extract_text()
+        if (not parser.text or len(parser.text) > MAX_PROMPT_CHARS["openai"]
+                or llm_cache.get(parser._cache_key()) is not None):
+            results[i] = parser.parse()
+            continue
+        
+        request_lines.append(json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": parser._openai_request_body(parser._generate_llm_prompt())
+        }))
+    
+    if request_lines:
+        responses = _run_openai_batch(request_lines, parsers[0].api_key, poll_interval)
+        for i, parser in enumerate(parsers):
+            if results[i] is not None:
+                continue
+            llm_response = responses.get(str(i), {"error": "No response in OpenAI batch output"})
+            if "error" not in llm_response:
+                llm_cache.set(parser._cache_key(), llm_response)
+            results[i] = parser._build_results(llm_response)
+    
+    return results
@@ -1,35 +1,49 @@
 import os
+import json
+import time
 import uuid
-import shutil
+import hashlib
+import tempfile
+import threading
+import asyncio
+import aiofiles
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from typing import List, Optional, Literal
 from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Header, Depends, Query
-from fastapi.responses import FileResponse, HTMLResponse
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 # Add try-except blocks for imports that might fail
-try:
-    import pandas as pd
-except ImportError:
-    raise ImportError("Failed to import pandas. Please run './fix_dependencies.sh' (or fix_dependencies.bat on Windows) to fix dependency issues.")
-
 try:
     # Use the new LLM parser
-    from llm_pdf_parser import LLMPDFParser
+    from llm_pdf_parser import LLMPDFParser, PROMPT_VERSION, init_shared_resources
 except ImportError:
     raise ImportError("Failed to import llm_pdf_parser. Please check if all dependencies are installed correctly.")
 
 try:
-    from utils import ensure_directories, save_to_csv, save_items_to_csv
+    from utils import ensure_directories, save_to_csv, save_items_to_csv, compute_file_hash
 except ImportError:
     raise ImportError("Failed to import utils. Please check if the file exists.")
 
+try:
+    import llm_cache
+except ImportError:
+    raise ImportError("Failed to import llm_cache. Please check if the file exists.")
+
 try:
     from models import ParsingResponse
 except ImportError:
     raise ImportError("Failed to import models. Please check if the file exists.")
 
+# Serialize JSON responses with orjson when it is installed
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 # LLM API key model
 class LLMAPIKey(BaseModel):
     provider: Literal["google", "openai"] = "google"
@@ -38,25 +52,223 @@ class LLMAPIKey(BaseModel):
 app = FastAPI(
     title="PDF Invoice Parser with LLM",
     description="API for parsing invoice PDFs and extracting structured data using LLM (Google Gemini or OpenAI)",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse if HAS_ORJSON else JSONResponse
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+# CORS headers added to every cross-origin response (any origin, with credentials)
+CORS_HEADERS = (
+    (b"access-control-allow-credentials", b"true"),
+    (b"vary", b"Origin"),
+)
+CORS_PREFLIGHT_HEADERS = CORS_HEADERS + (
+    (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+    (b"access-control-max-age", b"600"),
 )
 
+class CORSMiddleware:
+    """
+    Minimal CORS middleware allowing any origin, method and header, with credentials.
+    The allowed origin is the request's Origin (browsers reject "*" with credentials) and the
+    remaining headers are precomputed, so no per-request allow-list matching is done.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        origin = None
+        requested_headers = None
+        is_preflight = False
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                is_preflight = True
+            elif name == b"access-control-request-headers":
+                requested_headers = value
+        
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+        
+        # Answer preflight requests directly
+        if is_preflight and scope["method"] == "OPTIONS":
+            headers = [(b"access-control-allow-origin", origin), *CORS_PREFLIGHT_HEADERS]
+            if requested_headers:
+                headers.append((b"access-control-allow-headers", requested_headers))
+            await send({"type": "http.response.start", "status": 204, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []), (b"access-control-allow-origin", origin), *CORS_HEADERS
+                ]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+
+# Add CORS middleware
+app.add_middleware(CORSMiddleware)
+
+# Directories for uploaded files being processed and for generated CSV and status files
+TEMP_DIR = Path("temp")
+OUTPUT_DIR = Path("output")
+
 # Create necessary directories
-ensure_directories()
-os.makedirs("static", exist_ok=True)
+ensure_directories("static")
 
 # Mount static files directory
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Reuse LLM responses of near-identical invoices (requires sentence-transformers and faiss)
+USE_SEMANTIC_CACHE = os.environ.get("USE_SEMANTIC_CACHE", "").lower() in ("1", "true", "yes")
+
+def _init_worker():
+    """Set up each worker process once, so requests reuse its HTTP connections and embedding model."""
+    # OCR runs several tesseract processes at once, so limit each of them to one thread
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    init_shared_resources(use_semantic_cache=USE_SEMANTIC_CACHE)
+
+# Number of uvicorn worker processes; each one imports this module and starts its own parsing pool
+WORKERS = int(os.environ.get("WORKERS", "1"))
+
+# Parser processes per uvicorn worker. By default the cores are split between the uvicorn workers,
+# so WORKERS > 1 doesn't start WORKERS x cpu_count parsers that each load the OCR/LLM stack
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", "0")) or max(1, (os.cpu_count() or 1) // WORKERS)
+
+# Worker processes that run the PDF parsing, so CPU-bound text extraction and OCR run on all
+# cores without blocking the event loop
+process_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, initializer=_init_worker)
+
+def _parse_pdf(pdf_path: str, provider: str, api_key: str, content_hash: Optional[str] = None):
+    """
+    Parse a PDF with the LLM parser for the given provider.
+    Results are cached by the SHA-256 of the PDF contents, so re-uploaded invoices skip the LLM.
+    Defined at module level so it can be sent to the worker processes.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        provider: LLM provider ("google" or "openai")
+        api_key: API key for the provider
+        content_hash: SHA-256 of the PDF contents, computed from the file if not given
+        
+    Returns:
+        Tuple of (invoice_data, item_data)
+    """
+    content_hash = content_hash or compute_file_hash(pdf_path)
+    cache_key = f"pdf|{PROMPT_VERSION}|{provider}|{content_hash}"
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        print(f"Using cached result for {pdf_path}")
+        invoice_data, item_data = cached
+        
+        # Give the re-uploaded invoice its own serial number
+        serial_number = str(uuid.uuid4())
+        invoice_data["Serial Number"] = serial_number
+        for item in item_data:
+            item["Invoice Serial Number"] = serial_number
+        return invoice_data, item_data
+    
+    if provider == "google":
+        parser = LLMPDFParser(
+            pdf_path=pdf_path,
+            api_key=api_key,
+            llm_provider="google",
+            use_semantic_cache=USE_SEMANTIC_CACHE,
+            content_hash=content_hash
+        )
+    else:  # provider == "openai"
+        parser = LLMPDFParser(
+            pdf_path=pdf_path,
+            openai_api_key=api_key,
+            llm_provider="openai",
+            use_semantic_cache=USE_SEMANTIC_CACHE,
+            content_hash=content_hash
+        )
+    
+    invoice_data, item_data = parser.parse()
+    
+    # Only cache successful LLM extractions, not fallback or error results
+    remarks = invoice_data.get("Additional Remarks", "")
+    if remarks.startswith("Extracted with") and "fallback" not in remarks:
+        llm_cache.set(cache_key, [invoice_data, item_data])
+    
+    return invoice_data, item_data
+
+def _save_results(invoice_data: dict, item_data: List[dict], invoice_csv: Path, item_csv: Path):
+    """
+    Save the parsed invoice and line items to CSV files.
+    Run on a thread, so the blocking file writes of concurrent jobs overlap and don't stall the event loop.
+    """
+    save_to_csv(invoice_data, invoice_csv)
+    save_items_to_csv(item_data, item_csv)
+
+@app.on_event("shutdown")
+def shutdown_process_pool():
+    """Stop the worker processes when the server shuts down."""
+    process_pool.shutdown()
+
+# Random bytes drawn from the OS at a time for short_id, so ids don't each need a syscall
+ID_RANDOM_POOL_SIZE = 1024
+_id_random_pool = b""
+_id_random_offset = 0
+_id_random_pool_lock = threading.Lock()
+
+def short_id() -> str:
+    """Generate a random 16-character hex id for job, file and output names."""
+    global _id_random_pool, _id_random_offset
+    with _id_random_pool_lock:
+        if _id_random_offset + 8 > len(_id_random_pool):
+            _id_random_pool = os.urandom(ID_RANDOM_POOL_SIZE)
+            _id_random_offset = 0
+        random_bytes = _id_random_pool[_id_random_offset:_id_random_offset + 8]
+        _id_random_offset += 8
+    return random_bytes.hex()
+
+# PDF files start with this header; readers accept it anywhere in the first 1024 bytes
+PDF_MAGIC = b"%PDF-"
+
+async def is_pdf(file: UploadFile) -> bool:
+    """Check whether an uploaded file is a PDF from its header bytes, leaving the file at its start."""
+    head = await file.read(1024)
+    await file.seek(0)
+    return PDF_MAGIC in head
+
+# Size of the chunks used to stream uploads to disk (1 MiB)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+async def save_upload(file: UploadFile, path: Path) -> str:
+    """
+    Stream an uploaded file to disk in chunks without blocking the event loop.
+    The SHA-256 of the contents is computed in the same pass, so the file isn't read twice.
+    The parse result of path is cached under this hash, so path must be unique to the request;
+    otherwise another upload could replace the file and its data be cached under the wrong hash.
+    
+    Args:
+        file: Uploaded file
+        path: Destination path, unique to this upload
+        
+    Returns:
+        Hex SHA-256 digest of the file contents
+    """
+    digest = hashlib.sha256()
+    # Exclusive create: never write into a file another request is still using
+    async with aiofiles.open(path, "xb") as out:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            await out.write(chunk)
+    return digest.hexdigest()
+
 # Helper to get API key based on provider
 async def get_api_key(
     provider: str = Query("google", description="LLM provider to use (google or openai)"),
@@ -94,10 +306,8 @@ async def get_api_key(
         detail=f"API key for {provider} is required. Provide it via X-API-Key header, api_key query parameter, or {provider.upper()}_API_KEY environment variable."
     )
 
-@app.get("/", include_in_schema=False)
-async def root():
-    """Serve the HTML interface."""
-    html_content = """
+# HTML interface served at the root, encoded once at import time
+ROOT_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -199,8 +409,16 @@ async def root():
         </script>
     </body>
     </html>
-    """
-    return HTMLResponse(content=html_content)
+""".encode("utf-8")
+ROOT_HTML_HEADERS = {
+    "Cache-Control": "public, max-age=3600",
+    "ETag": f'"{hashlib.sha256(ROOT_HTML).hexdigest()[:16]}"'
+}
+
+@app.get("/", include_in_schema=False)
+async def root():
+    """Serve the HTML interface."""
+    return Response(content=ROOT_HTML, media_type="text/html", headers=ROOT_HTML_HEADERS)
 
 @app.post("/upload-invoice/", response_model=ParsingResponse)
 async def upload_invoice(
@@ -212,45 +430,39 @@ async def upload_invoice(
     The file will be parsed and data will be extracted to CSV files.
     """
     # Validate file type
-    if not file.filename.endswith('.pdf'):
+    if not await is_pdf(file):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
     
     # Get provider and API key
     provider = api_info["provider"]
     api_key = api_info["api_key"]
     
-    # Save the uploaded file temporarily
-    temp_file_path = f"temp/{file.filename}"
-    with open(temp_file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Save the uploaded file temporarily under a name unique to this request, so concurrent uploads
+    # with the same filename don't overwrite each other and the client can't choose the path
+    temp_file_path = TEMP_DIR / f"{short_id()}.pdf"
     
     try:
-        # Initialize parser and parse PDF with the provided API key and provider
-        if provider == "google":
-            parser = LLMPDFParser(
-                pdf_path=temp_file_path,
-                api_key=api_key,
-                llm_provider="google"
-            )
-        else:  # provider == "openai"
-            parser = LLMPDFParser(
-                pdf_path=temp_file_path,
-                openai_api_key=api_key,
-                llm_provider="openai"
-            )
-            
-        invoice_data, item_data = parser.parse()
+        # Stream the upload to disk inside the try, so a failed or cancelled write is cleaned up too
+        content_hash = await save_upload(file, temp_file_path)
+        
+        # Parse the PDF in a worker process with the provided API key and provider
+        loop = asyncio.get_running_loop()
+        invoice_data, item_data = await loop.run_in_executor(
+            process_pool, _parse_pdf, str(temp_file_path), provider, api_key, content_hash
+        )
         
         # Check if we used the fallback method
         using_fallback = "Fallback" in invoice_data.get("Additional Remarks", "")
         
         # Generate unique filenames for output CSVs
-        invoice_csv = f"output/invoice_level_{uuid.uuid4()}.csv"
-        item_csv = f"output/item_level_{uuid.uuid4()}.csv"
+        csv_id = short_id()
+        invoice_csv_name = f"invoice_level_{csv_id}.csv"
+        item_csv_name = f"item_level_{csv_id}.csv"
+        invoice_csv = OUTPUT_DIR / invoice_csv_name
+        item_csv = OUTPUT_DIR / item_csv_name
         
         # Save data to CSV files
-        save_to_csv(invoice_data, invoice_csv)
-        save_items_to_csv(item_data, item_csv)
+        await loop.run_in_executor(None, _save_results, invoice_data, item_data, invoice_csv, item_csv)
         
         message = f"Invoice processed successfully with {provider.capitalize()} LLM"
         if using_fallback:
@@ -258,8 +470,8 @@ async def upload_invoice(
         
         return ParsingResponse(
             status="success",
-            invoice_csv_url=f"/download/{os.path.basename(invoice_csv)}",
-            item_csv_url=f"/download/{os.path.basename(item_csv)}",
+            invoice_csv_url=f"/download/{invoice_csv_name}",
+            item_csv_url=f"/download/{item_csv_name}",
             message=message
         )
     
@@ -276,7 +488,7 @@ async def download_file(filename: str):
     """
     Download a generated CSV file.
     """
-    file_path = f"output/{filename}"
+    file_path = OUTPUT_DIR / filename
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     
@@ -292,7 +504,7 @@ async def cleanup_file(filename: str):
     """
     Delete a generated CSV file when it's no longer needed.
     """
-    file_path = f"output/{filename}"
+    file_path = OUTPUT_DIR / filename
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     
@@ -333,7 +545,7 @@ async def bulk_upload_invoices(
     """
     # Validate file types
     for file in files:
-        if not file.filename.endswith('.pdf'):
+        if not await is_pdf(file):
             raise HTTPException(status_code=400, detail=f"Only PDF files are accepted. {file.filename} is not a PDF.")
     
     # Get provider and API key
@@ -341,23 +553,36 @@ async def bulk_upload_invoices(
     api_key = api_info["api_key"]
     
     # Process files in the background
-    job_id = str(uuid.uuid4())
+    job_id = short_id()
     processing_info = []
     
     for file in files:
-        file_id = str(uuid.uuid4())
-        temp_file_path = f"temp/{file_id}_{file.filename}"
-        
-        # Save file temporarily
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
+        file_id = short_id()
+        filename = file.filename
         processing_info.append({
             "file_id": file_id,
-            "filename": file.filename,
-            "temp_path": temp_file_path
+            "filename": filename,
+            # Name temp files by id only, so the client filename can't choose the path
+            "temp_path": TEMP_DIR / f"{file_id}.pdf"
         })
     
+    # Save files temporarily, streaming all uploads to disk concurrently. Let every write finish,
+    # then remove all temp files if any of them failed, since the job won't be started
+    try:
+        content_hashes = await asyncio.gather(*(
+            save_upload(file, info["temp_path"]) for file, info in zip(files, processing_info)
+        ), return_exceptions=True)
+        errors = [result for result in content_hashes if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+    except BaseException:
+        for info in processing_info:
+            if os.path.exists(info["temp_path"]):
+                os.remove(info["temp_path"])
+        raise
+    for info, content_hash in zip(processing_info, content_hashes):
+        info["content_hash"] = content_hash
+    
     # Queue background task for processing
     background_tasks.add_task(process_bulk_files, job_id, processing_info, provider, api_key)
     
@@ -373,12 +598,13 @@ async def get_job_status(job_id: str):
     """
     Check the status of a bulk processing job.
     """
-    status_file = f"output/job_{job_id}_status.json"
+    status_file = OUTPUT_DIR / f"job_{job_id}_status.json"
     if not os.path.exists(status_file):
         raise HTTPException(status_code=404, detail="Job not found")
     
     try:
-        status_data = pd.read_json(status_file).to_dict(orient="records")
+        with open(status_file, 'r', encoding='utf-8') as f:
+            status_data = json.load(f)
         return {
             "job_id": job_id,
             "files": status_data
@@ -386,55 +612,69 @@ async def get_job_status(job_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking job status: {str(e)}")
 
+# Minimum time between status file updates while a bulk job is running
+STATUS_WRITE_INTERVAL = 0.2
+
+def write_job_status(status_file: Path, results: List[dict]):
+    """
+    Write the per-file results of a bulk job to its status file.
+    The file is written to a temporary file and renamed over the status file, so
+    concurrent readers always see a complete status.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=status_file.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(results, f)
+        os.replace(temp_path, status_file)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
 async def process_bulk_files(job_id: str, processing_info: List[dict], provider: str, api_key: str):
     """
     Process multiple files in the background with LLM.
+    Files are parsed concurrently in the worker processes.
     Updates a status file as processing progresses.
     """
-    status_file = f"output/job_{job_id}_status.json"
-    results = []
-    
-    for info in processing_info:
-        result = {
+    status_file = OUTPUT_DIR / f"job_{job_id}_status.json"
+    loop = asyncio.get_running_loop()
+    results = [
+        {
             "file_id": info["file_id"],
             "filename": info["filename"],
             "status": "processing",
             "provider": provider
         }
-        results.append(result)
-        
-        # Update status
-        pd.DataFrame(results).to_json(status_file, orient="records")
-        
+        for info in processing_info
+    ]
+    
+    # Update status
+    write_job_status(status_file, results)
+    last_status_write = time.monotonic()
+    
+    async def process_file(info: dict, result: dict):
+        nonlocal last_status_write
+        file_id = info["file_id"]
+        temp_path = info["temp_path"]
         try:
-            # Parse the PDF with the appropriate LLM provider
-            if provider == "google":
-                parser = LLMPDFParser(
-                    pdf_path=info["temp_path"],
-                    api_key=api_key,
-                    llm_provider="google"
-                )
-            else:  # provider == "openai"
-                parser = LLMPDFParser(
-                    pdf_path=info["temp_path"],
-                    openai_api_key=api_key,
-                    llm_provider="openai"
-                )
-                
-            invoice_data, item_data = parser.parse()
+            # Parse the PDF with the appropriate LLM provider in a worker process
+            invoice_data, item_data = await loop.run_in_executor(
+                process_pool, _parse_pdf, str(temp_path), provider, api_key, info["content_hash"]
+            )
             
             # Generate filenames
-            invoice_csv = f"output/invoice_level_{info['file_id']}.csv"
-            item_csv = f"output/item_level_{info['file_id']}.csv"
+            invoice_csv_name = f"invoice_level_{file_id}.csv"
+            item_csv_name = f"item_level_{file_id}.csv"
+            invoice_csv = OUTPUT_DIR / invoice_csv_name
+            item_csv = OUTPUT_DIR / item_csv_name
             
             # Save data
-            save_to_csv(invoice_data, invoice_csv)
-            save_items_to_csv(item_data, item_csv)
+            await loop.run_in_executor(None, _save_results, invoice_data, item_data, invoice_csv, item_csv)
             
             # Update result
             result["status"] = "completed"
-            result["invoice_csv"] = os.path.basename(invoice_csv)
-            result["item_csv"] = os.path.basename(item_csv)
+            result["invoice_csv"] = invoice_csv_name
+            result["item_csv"] = item_csv_name
             
         except Exception as e:
             # Update result with error
@@ -443,12 +683,33 @@ async def process_bulk_files(job_id: str, processing_info: List[dict], provider:
             
         finally:
             # Clean up temp file
-            if os.path.exists(info["temp_path"]):
-                os.remove(info["temp_path"])
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
             
-            # Update status file
-            pd.DataFrame(results).to_json(status_file, orient="records")
+            # Update status file, at most once per STATUS_WRITE_INTERVAL so large jobs don't
+            # rewrite the whole list after every file
+            if time.monotonic() - last_status_write >= STATUS_WRITE_INTERVAL:
+                write_job_status(status_file, results)
+                last_status_write = time.monotonic()
+    
+    await asyncio.gather(*(
+        process_file(info, result) for info, result in zip(processing_info, results)
+    ))
+    
+    # Write the final status
+    write_job_status(status_file, results)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    # Auto-reload is meant for development and can't be combined with multiple workers.
+    # Parsing already runs on all cores in the process pool, so one worker is the default.
+    reload = os.environ.get("RELOAD", "").lower() in ("1", "true", "yes")
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=reload,
+        workers=None if reload else WORKERS,
+        loop="auto",  # uvloop when installed
+        http="auto"   # httptools when installed
+    )
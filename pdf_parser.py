@@ -1,7 +1,9 @@
 import os
 import re
 import uuid
-import numpy as np
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from typing import Dict, List, Tuple, Any, Optional
 
 # Remove old OCR imports
@@ -26,26 +28,177 @@ except ImportError:
     HAS_DOCTR = False
     print("Warning: doctr package not found.")
 
+# Pages per text-detection forward pass of the doctr OCR model (doctr's default is 2), so
+# multi-page scans are detected in fewer, larger batches
+OCR_DETECTION_BATCH_SIZE = 8
+
+# Document types to look for, with their lowercase form for case-insensitive matching
+_DOC_TYPES = [(doc_type, doc_type.lower()) for doc_type in ("Tax Invoice", "Delivery Challan", "Stock Transfer")]
+
+# Precompiled regex patterns
+_INVOICE_NUMBER_PATS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r"Invoice\s*No\.?\s*:\s*([A-Za-z0-9/\-_]+)",
+        r"Invoice\s*Number\s*:\s*([A-Za-z0-9/\-_]+)",
+        r"Bill\s*No\.?\s*:\s*([A-Za-z0-9/\-_]+)"
+    )
+]
+_MENSA_INVOICE_RE = re.compile(r"(Mensa/[A-Z]{2}/[A-Z]{3}/\d+)")
+# Date patterns fused into one lookahead so a single scan finds the first match of each, with the
+# patterns' priority given by _DATE_GROUPS. At most one alternative can match at any position
+_DATE_RE = re.compile(
+    r"(?=Invoice\s*Date\s*:\s*(?P<invoice_date>\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})"
+    r"|Date\s*:\s*(?P<date>\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})"
+    r"|Date\s*:\s*(?P<date_month_name>\d{1,2}[A-Za-z]{3}\d{2,4})"
+    r"|Invoice\s*Date\s*:?\s*(?P<invoice_date_month_name>\d{1,2}[A-Za-z]{3}\d{2,4})"
+    r"|(?P<any_date>\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4}))",
+    re.IGNORECASE
+)
+_DATE_GROUPS = ("invoice_date", "date", "date_month_name", "invoice_date_month_name", "any_date")
+_GSTIN = r"[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1}"
+_GSTIN_RE = re.compile(rf"({_GSTIN})")
+# Labels that precede each party's GSTIN, and a precompiled search for the first GSTIN within
+# 300 characters after any of them
+_GSTIN_CONTEXTS = {
+    "supplier": "Supplier|Seller|From|GSTIN",
+    "buyer": "Buyer|Customer|Bill to|GSTIN",
+    "consignee": "Consignee|Ship to|GSTIN"
+}
+_GSTIN_CONTEXT_RES = {
+    party: re.compile(rf"(?:{context})[\s\S]{{0,300}}?({_GSTIN})", re.IGNORECASE)
+    for party, context in _GSTIN_CONTEXTS.items()
+}
+# Labels of the invoice totals followed by their amount, matched with a zero-width lookahead like the taxes
+_NUMERIC_VALUES_RE = re.compile(
+    r"(?=(?:(?P<quantity>Total\s*Qty|Quantity)"
+    r"|(?P<subtotal>Sub\s*Total|Taxable\s*Value|Assessable\s*Value)"
+    r"|(?P<total>Total\s*Amount|Grand\s*Total|Invoice\s*Value))"
+    r".*?(?:Rs\.?|INR)?\s*(?P<amount>\d+(?:,\d+)*(?:\.\d+)?))",
+    re.IGNORECASE
+)
+_ADDRESS_PATS = [
+    re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+        # Explicit length bound keeps backtracking on noisy OCR text constant per start position
+        r"Address\s*:\s*(.{0,400}?)(?:GSTIN|PAN|Phone|Email|$)",
+        r"\n(.*?(?:Road|Street|Avenue|Lane|Boulevard|Drive|Place|Highway|Expressway|Freeway).*?)(?:\n\s*\n|\n[A-Z])",
+        r"\n(.*?(?:Village|Town|City|District|State|Country).*?)(?:\n\s*\n|\n[A-Z])",
+        r"\n(.*?(?:\d{6}).*?)(?:\n\s*\n|\n[A-Z])"  # Look for pincode (6 digits)
+    )
+]
+_ADDRESS_EXCLUDE_RE = re.compile(r"GSTIN|PAN|Phone|Email", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+# Tax label followed by its amount. The zero-width lookahead lets overlapping matches be found, so every
+# label is matched from every position exactly as a separate search for that label would
+_TAX_AMOUNT_RE = re.compile(
+    r"(?=(CGST|SGST|IGST|CESS).*?(?:Rs\.?|INR)?\s*(\d+(?:,\d+)*(?:\.\d+)?))", re.IGNORECASE
+)
+_TABLE_PATS = [
+    re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+        r"(S\.?No\.?|Sr\.?\s*No\.?|Item Code|HSN|Description|Qty|Rate|Amount).*?(?=Total|Grand Total|Sub Total)",
+        r"(Item\s*Details).*?(?=Total|Grand Total|Sub Total)"
+    )
+]
+# Lowercase keywords that mark a table header line. "Sr No" allows any whitespace between
+# the words, so it is only checked with a regex when the line contains "sr"
+_TABLE_HEADER_KEYWORDS = ("sno", "s.no", "item code", "hsn", "description", "qty", "rate", "amount")
+_SERIAL_NO_RE = re.compile(r"Sr\.?\s*No", re.IGNORECASE)
+_COLUMN_SPLIT_RE = re.compile(r"\s{2,}")
+_NON_NUMERIC_RE = re.compile(r"[^\d.]")
+_DIGITS_RE = re.compile(r"\d+")
+_TAX_RATE_RE = re.compile(r"(\d+(?:\.\d+)?)%")
+_LINE_TOTAL_RE = re.compile(r"(\d+(?:,\d+)*(?:\.\d+)?)$")
+_SKU_RE = re.compile(r"([A-Z0-9]+_[A-Z0-9]+)")
+_HSN_RE = re.compile(r"(\d{8})")
+_QUANTITY_RE = re.compile(r"(\d+)\s*(?:PCS|EA|NOS)")
+_AMOUNT_IN_WORDS_PATS = [
+    re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+        r"Amount\s*(?:in|In)\s*Words\s*:\s*(.*?)(?:\n|$)",
+        r"(?:Rupees|Rs\.?)\s*(.*?)(?:Only|only)(?:\n|$)",
+        r"Total\s*in\s*words\s*:\s*(.*?)(?:\n|$)"
+    )
+]
+_IRN_RE = re.compile(r"IRN\s*:?\s*([a-fA-F0-9]{64})")
+_EWAY_BILL_RE = re.compile(r"e[-\s]?way\s*bill\s*no\.?:?\s*(\d+)", re.IGNORECASE)
+
+# Default values of an item row, copied for each line item so the keys keep this column order
+_ITEM_TEMPLATE = {
+    "Invoice Serial Number": "",
+    "Invoice Number": "",
+    "Line #": 0,
+    "PO Identifier": "",
+    "Item/SKU Code": "",
+    "Item Description": "",
+    "HSN Code": "",
+    "Quantity": 0,
+    "UOM": "",
+    "Unit Price": 0.0,
+    "Discount": 0.0,
+    "Tax Rate": "",
+    "CGST Rate": "",
+    "SGST Rate": "",
+    "IGST Rate": "",
+    "CGST Amount": 0.0,
+    "SGST Amount": 0.0,
+    "IGST Amount": 0.0,
+    "Line Total Value": 0.0
+}
+
+# Translation table that deletes thousands separators
+_COMMA_TABLE = str.maketrans('', '', ',')
+
+def _to_float(value: str) -> float:
+    """Convert an amount such as "1,234.50" to a float, returning 0.0 if it isn't a number."""
+    try:
+        return float(value.translate(_COMMA_TABLE))
+    except ValueError:
+        return 0.0
+
+
+def _init_parse_worker():
+    """Limit each worker process to one math library thread, so parallel parses don't oversubscribe the cores."""
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+
+def _parse_invoice(parser_cls, pdf_path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Parse a single PDF in a worker process. Defined at module level so it can be pickled."""
+    return parser_cls(pdf_path).parse()
+
+
 class InvoiceParser:
     """
     Parser for PDF invoices that extracts structured data for both invoice-level and item-level information.
     Supports both text-based PDFs and scanned image PDFs through OCR.
     """
     
+    # doctr OCR model, loaded lazily by _get_ocr_model (False if loading failed)
+    _ocr_model = None
+    _ocr_model_lock = threading.Lock()
+    
     def __init__(self, pdf_path: str):
         self.pdf_path = pdf_path
         self.text = ""
+        self._text_lower = ""
+        self._gstin_hits = None
+        self._pos_cache = {}
         self.serial_number = str(uuid.uuid4())
-        
-        # Initialize OCR model if needed for fallback
-        self.ocr_model = None
-        if HAS_DOCTR:
-            try:
-                self.ocr_model = ocr_predictor(pretrained=True)
-                print("Loaded doctr OCR engine as fallback")
-            except Exception as e:
-                print(f"Error initializing doctr OCR: {str(e)}")
-                self.ocr_model = None
+    
+    @classmethod
+    def _get_ocr_model(cls):
+        """
+        Get the doctr OCR model shared by all parsers in this process, loading it on first use.
+        The model is only needed when docling fails, so documents that docling handles never load it.
+        """
+        with cls._ocr_model_lock:
+            if cls._ocr_model is None:
+                cls._ocr_model = False
+                if HAS_DOCTR:
+                    try:
+                        cls._ocr_model = ocr_predictor(pretrained=True, det_bs=OCR_DETECTION_BATCH_SIZE)
+                        print("Loaded doctr OCR engine as fallback")
+                    except Exception as e:
+                        # Don't retry loading the model for every document
+                        print(f"Error initializing doctr OCR: {str(e)}")
+            return cls._ocr_model or None
         
     def _extract_text_with_docling(self) -> str:
         """Extract text from PDF using docling.document_converter."""
@@ -61,57 +214,56 @@ class InvoiceParser:
     
     def _extract_text_with_ocr(self) -> str:
         """Extract text from PDF using OCR as fallback method."""
-        if not HAS_DOCLING or not self._extract_text_with_docling():
-            print("Falling back to OCR extraction...")
-            if HAS_DOCTR and self.ocr_model:
-                try:
-                    # Load the document
-                    doc = DocumentFile.from_pdf(self.pdf_path)
-                    
-                    # Run OCR on all pages
-                    result = self.ocr_model(doc)
-                    
-                    # Extract text from OCR result
-                    full_text = ""
-                    for page in result.pages:
-                        for block in page.blocks:
-                            for line in block.lines:
-                                for word in line.words:
-                                    full_text += word.value + " "
-                                full_text += "\n"
-                    
-                    print(f"Successfully extracted {len(full_text)} characters of text with doctr")
-                    return full_text
-                except Exception as e:
-                    print(f"Error in OCR processing: {str(e)}")
-            else:
-                print("No OCR method available")
+        print("Falling back to OCR extraction...")
+        ocr_model = self._get_ocr_model()
+        if ocr_model:
+            try:
+                # Load the document
+                doc = DocumentFile.from_pdf(self.pdf_path)
+                
+                # Run OCR on all pages
+                result = ocr_model(doc)
+                
+                # Extract text from OCR result, collecting the lines and joining them once
+                lines = []
+                for page in result.pages:
+                    for block in page.blocks:
+                        for line in block.lines:
+                            lines.append("".join(word.value + " " for word in line.words) + "\n")
+                full_text = "".join(lines)
+                
+                print(f"Successfully extracted {len(full_text)} characters of text with doctr")
+                return full_text
+            except Exception as e:
+                print(f"Error in OCR processing: {str(e)}")
+        else:
+            print("No OCR method available")
         return ""
     
+    def _pos(self, substring: str) -> int:
+        """Find the first position of a substring in the text, remembering it for later lookups."""
+        pos = self._pos_cache.get(substring)
+        if pos is None:
+            pos = self.text.find(substring)
+            self._pos_cache[substring] = pos
+        return pos
+    
     def _extract_document_type(self) -> str:
         """Extract document type from the text."""
-        doc_types = ["Tax Invoice", "Delivery Challan", "Stock Transfer"]
-        for doc_type in doc_types:
-            if doc_type.lower() in self.text.lower():
+        for doc_type, doc_type_lower in _DOC_TYPES:
+            if doc_type_lower in self._text_lower:
                 return doc_type
         return "Tax Invoice"  # Default to Tax Invoice if not found
     
     def _extract_invoice_number(self) -> str:
         """Extract invoice number from the text."""
-        patterns = [
-            r"Invoice\s*No\.?\s*:\s*([A-Za-z0-9/\-_]+)",
-            r"Invoice\s*Number\s*:\s*([A-Za-z0-9/\-_]+)",
-            r"Bill\s*No\.?\s*:\s*([A-Za-z0-9/\-_]+)"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, self.text, re.IGNORECASE)
+        for pattern in _INVOICE_NUMBER_PATS:
+            match = pattern.search(self.text)
             if match:
                 return match.group(1).strip()
         
         # Try to find Mensa format invoice number
-        mensa_pattern = r"(Mensa/[A-Z]{2}/[A-Z]{3}/\d+)"
-        match = re.search(mensa_pattern, self.text)
+        match = _MENSA_INVOICE_RE.search(self.text)
         if match:
             return match.group(1).strip()
         
@@ -119,46 +271,36 @@ class InvoiceParser:
     
     def _extract_date(self) -> str:
         """Extract invoice date from the text."""
-        patterns = [
-            r"Invoice\s*Date\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})",
-            r"Date\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})",
-            r"Date\s*:\s*(\d{1,2}[A-Za-z]{3}\d{2,4})",
-            r"Invoice\s*Date\s*:?\s*(\d{1,2}[A-Za-z]{3}\d{2,4})",
-            r"(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, self.text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
+        # Keep the first match of each pattern, stopping early once the preferred one is found
+        dates = {}
+        for match in _DATE_RE.finditer(self.text):
+            name = match.lastgroup
+            if name not in dates:
+                dates[name] = match.group(name)
+                if name == _DATE_GROUPS[0]:
+                    break
+        
+        for name in _DATE_GROUPS:
+            if name in dates:
+                return dates[name].strip()
         
         return ""
     
-    def _extract_gstin(self, context_pattern: str) -> str:
-        """Extract GSTIN based on context."""
-        pattern = rf"{context_pattern}.*?([0-9]{{2}}[A-Z]{{5}}[0-9]{{4}}[A-Z][0-9A-Z]{{1}}[Z]{{1}}[0-9A-Z]{{1}})"
-        match = re.search(pattern, self.text, re.IGNORECASE | re.DOTALL)
+    def _extract_gstin(self, party: str) -> str:
+        """Extract GSTIN of a party ("supplier", "buyer" or "consignee") based on context."""
+        match = _GSTIN_CONTEXT_RES[party].search(self.text)
         if match:
             return match.group(1).strip()
         
-        # Generic GSTIN pattern search
-        gstin_pattern = r"([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})"
-        matches = re.findall(gstin_pattern, self.text)
-        if matches and context_pattern:
+        # Generic GSTIN pattern search, done once per document with the position of every match
+        if self._gstin_hits is None:
+            self._gstin_hits = [(m.group(1), m.start()) for m in _GSTIN_RE.finditer(self.text)]
+        if self._gstin_hits:
             # Find the GSTIN that appears closest to the context
-            context_pos = self.text.find(context_pattern)
+            context_pos = self._pos(_GSTIN_CONTEXTS[party])
             if context_pos != -1:
-                closest_match = None
-                min_distance = float('inf')
-                
-                for gstin in matches:
-                    gstin_pos = self.text.find(gstin)
-                    distance = abs(gstin_pos - context_pos)
-                    if distance < min_distance:
-                        min_distance = distance
-                        closest_match = gstin
-                
-                if closest_match and min_distance < 500:  # Arbitrary threshold
+                closest_match, gstin_pos = min(self._gstin_hits, key=lambda hit: abs(hit[1] - context_pos))
+                if abs(gstin_pos - context_pos) < 500:  # Arbitrary threshold
                     return closest_match
         
         return ""
@@ -169,7 +311,7 @@ class InvoiceParser:
             return ""
         
         # Look for address after the entity name
-        name_pos = self.text.find(entity_name)
+        name_pos = self._pos(entity_name)
         if name_pos == -1:
             return ""
         
@@ -177,116 +319,75 @@ class InvoiceParser:
         chunk = self.text[name_pos:name_pos + 500]
         
         # Try to find address patterns
-        address_patterns = [
-            r"Address\s*:\s*(.*?)(?:GSTIN|PAN|Phone|Email|$)",
-            r"\n(.*?(?:Road|Street|Avenue|Lane|Boulevard|Drive|Place|Highway|Expressway|Freeway).*?)(?:\n\s*\n|\n[A-Z])",
-            r"\n(.*?(?:Village|Town|City|District|State|Country).*?)(?:\n\s*\n|\n[A-Z])",
-            r"\n(.*?(?:\d{6}).*?)(?:\n\s*\n|\n[A-Z])"  # Look for pincode (6 digits)
-        ]
-        
-        for pattern in address_patterns:
-            match = re.search(pattern, chunk, re.IGNORECASE | re.DOTALL)
+        for pattern in _ADDRESS_PATS:
+            match = pattern.search(chunk)
             if match:
                 address = match.group(1).strip()
                 # Clean up the address
-                address = re.sub(r'\s+', ' ', address)
+                address = _WHITESPACE_RE.sub(' ', address)
                 return address
         
         # Fallback: Just take a reasonable chunk
-        lines = chunk.split('\n')
-        address_lines = []
-        for i, line in enumerate(lines[1:6]):  # Take up to 5 lines after entity name
-            if line.strip() and not re.search(r'GSTIN|PAN|Phone|Email', line, re.IGNORECASE):
-                address_lines.append(line.strip())
-        
-        return ', '.join(address_lines)
+        # Take up to 5 lines after entity name
+        lines = chunk.split('\n', 6)[1:6]
+        return ', '.join(
+            line.strip() for line in lines if line.strip() and not _ADDRESS_EXCLUDE_RE.search(line)
+        )
     
     def _extract_entity_name(self, context_patterns: List[str]) -> str:
         """Extract entity name based on context patterns."""
         for pattern in context_patterns:
-            match = re.search(rf"{pattern}\s*:\s*(.*?)(?:\n|GSTIN|PAN|$)", self.text, re.IGNORECASE | re.DOTALL)
+            # The name ends at the line break, so it is bounded to one line of at most 200 characters
+            match = re.search(rf"{pattern}\s*:\s*([^\n]{{0,200}}?)(?:\n|GSTIN|PAN|$)", self.text, re.IGNORECASE)
             if match:
                 name = match.group(1).strip()
                 # Clean up the name
-                name = re.sub(r'\s+', ' ', name)
+                name = _WHITESPACE_RE.sub(' ', name)
                 return name
         
         return ""
     
     def _extract_tax_amounts(self) -> Tuple[float, float, float, float]:
         """Extract CGST, SGST, IGST, and CESS amounts."""
-        cgst = 0.0
-        sgst = 0.0
-        igst = 0.0
-        cess = 0.0
-        
-        # CGST pattern
-        cgst_pattern = r"CGST.*?(?:Rs\.?|INR)?\s*(\d+(?:,\d+)*(?:\.\d+)?)"
-        cgst_match = re.search(cgst_pattern, self.text, re.IGNORECASE)
-        if cgst_match:
-            cgst_str = cgst_match.group(1).replace(',', '')
-            try:
-                cgst = float(cgst_str)
-            except ValueError:
-                pass
-        
-        # SGST pattern
-        sgst_pattern = r"SGST.*?(?:Rs\.?|INR)?\s*(\d+(?:,\d+)*(?:\.\d+)?)"
-        sgst_match = re.search(sgst_pattern, self.text, re.IGNORECASE)
-        if sgst_match:
-            sgst_str = sgst_match.group(1).replace(',', '')
-            try:
-                sgst = float(sgst_str)
-            except ValueError:
-                pass
-        
-        # IGST pattern
-        igst_pattern = r"IGST.*?(?:Rs\.?|INR)?\s*(\d+(?:,\d+)*(?:\.\d+)?)"
-        igst_match = re.search(igst_pattern, self.text, re.IGNORECASE)
-        if igst_match:
-            igst_str = igst_match.group(1).replace(',', '')
-            try:
-                igst = float(igst_str)
-            except ValueError:
-                pass
-        
-        # CESS pattern
-        cess_pattern = r"CESS.*?(?:Rs\.?|INR)?\s*(\d+(?:,\d+)*(?:\.\d+)?)"
-        cess_match = re.search(cess_pattern, self.text, re.IGNORECASE)
-        if cess_match:
-            cess_str = cess_match.group(1).replace(',', '')
-            try:
-                cess = float(cess_str)
-            except ValueError:
-                pass
-        
-        return cgst, sgst, igst, cess
+        amounts = {"CGST": None, "SGST": None, "IGST": None, "CESS": None}
+        
+        # Scan the text once for all tax labels, keeping the first amount found for each
+        remaining = len(amounts)
+        for match in _TAX_AMOUNT_RE.finditer(self.text):
+            tax = match.group(1).upper()
+            if amounts[tax] is None:
+                amounts[tax] = _to_float(match.group(2))
+                remaining -= 1
+                if not remaining:
+                    break
+        
+        return tuple(amount or 0.0 for amount in amounts.values())
     
-    def _extract_numeric_value(self, context_pattern: str) -> float:
-        """Extract numeric value based on context."""
-        pattern = rf"{context_pattern}.*?(?:Rs\.?|INR)?\s*(\d+(?:,\d+)*(?:\.\d+)?)"
-        match = re.search(pattern, self.text, re.IGNORECASE)
-        if match:
-            value_str = match.group(1).replace(',', '')
-            try:
-                return float(value_str)
-            except ValueError:
-                pass
-        return 0.0
+    def _extract_numeric_values(self) -> Dict[str, float]:
+        """
+        Extract the total quantity, subtotal and total invoice value in a single scan of the text.
+        Returns a dict with the keys "quantity", "subtotal" and "total"; values not found are 0.0.
+        """
+        values = {"quantity": None, "subtotal": None, "total": None}
+        remaining = len(values)
+        for match in _NUMERIC_VALUES_RE.finditer(self.text):
+            key = next(name for name in values if match.group(name) is not None)
+            if values[key] is None:
+                values[key] = _to_float(match.group("amount"))
+                remaining -= 1
+                if not remaining:
+                    break
+        
+        return {key: value or 0.0 for key, value in values.items()}
     
     def _extract_line_items(self, invoice_number: str) -> List[Dict[str, Any]]:
         """Extract line items from the invoice."""
         item_data = []
         
         # Find the item table section
-        table_patterns = [
-            r"(S\.?No\.?|Sr\.?\s*No\.?|Item Code|HSN|Description|Qty|Rate|Amount).*?(?=Total|Grand Total|Sub Total)",
-            r"(Item\s*Details).*?(?=Total|Grand Total|Sub Total)"
-        ]
-        
         table_text = ""
-        for pattern in table_patterns:
-            match = re.search(pattern, self.text, re.IGNORECASE | re.DOTALL)
+        for pattern in _TABLE_PATS:
+            match = pattern.search(self.text)
             if match:
                 start_pos = match.start()
                 end_pos = self.text.find("Total", start_pos)
@@ -305,39 +406,29 @@ class InvoiceParser:
         # Filter out empty lines and headers
         for line in lines:
             line = line.strip()
-            if not line or re.search(r"(S\.?No\.?|Sr\.?\s*No\.?|Item Code|HSN|Description|Qty|Rate|Amount)", line, re.IGNORECASE):
+            if not line:
+                continue
+            line_lower = line.lower()
+            if any(keyword in line_lower for keyword in _TABLE_HEADER_KEYWORDS):
+                continue
+            if "sr" in line_lower and _SERIAL_NO_RE.search(line):
                 continue
             item_lines.append(line)
         
         # Process each item line
+        failed_lines = 0
+        last_error = None
         for i, line in enumerate(item_lines):
             # Try to parse the line
-            parts = re.split(r'\s{2,}', line)  # Split by multiple spaces
+            parts = _COLUMN_SPLIT_RE.split(line)  # Split by multiple spaces
             
             if len(parts) < 3:  # Not enough data
                 continue
             
-            item = {
-                "Invoice Serial Number": self.serial_number,
-                "Invoice Number": invoice_number,
-                "Line #": i + 1,
-                "PO Identifier": "",
-                "Item/SKU Code": "",
-                "Item Description": "",
-                "HSN Code": "",
-                "Quantity": 0,
-                "UOM": "",
-                "Unit Price": 0.0,
-                "Discount": 0.0,
-                "Tax Rate": "",
-                "CGST Rate": "",
-                "SGST Rate": "",
-                "IGST Rate": "",
-                "CGST Amount": 0.0,
-                "SGST Amount": 0.0,
-                "IGST Amount": 0.0,
-                "Line Total Value": 0.0
-            }
+            item = _ITEM_TEMPLATE.copy()
+            item["Invoice Serial Number"] = self.serial_number
+            item["Invoice Number"] = invoice_number
+            item["Line #"] = i + 1
             
             # Try to extract data based on position
             try:
@@ -345,14 +436,13 @@ class InvoiceParser:
                     # Typical format with many columns
                     item["Item/SKU Code"] = parts[0]
                     item["Item Description"] = parts[1]
-                    item["HSN Code"] = parts[2] if re.match(r'\d+', parts[2]) else ""
-                    item["Quantity"] = float(re.sub(r'[^\d.]', '', parts[3])) if parts[3] else 0
+                    item["HSN Code"] = parts[2] if _DIGITS_RE.match(parts[2]) else ""
+                    item["Quantity"] = float(_NON_NUMERIC_RE.sub('', parts[3])) if parts[3] else 0
                     item["UOM"] = "PCS"  # Default UOM
-                    item["Unit Price"] = float(re.sub(r'[^\d.]', '', parts[4])) if parts[4] else 0.0
+                    item["Unit Price"] = float(_NON_NUMERIC_RE.sub('', parts[4])) if parts[4] else 0.0
                     
                     # Try to find tax rate
-                    tax_pattern = r'(\d+(?:\.\d+)?)%'
-                    tax_match = re.search(tax_pattern, line)
+                    tax_match = _TAX_RATE_RE.search(line)
                     if tax_match:
                         tax_rate = float(tax_match.group(1))
                         item["Tax Rate"] = f"GST_{int(tax_rate)}" if tax_rate.is_integer() else f"GST_{tax_rate}"
@@ -367,92 +457,71 @@ class InvoiceParser:
                             item["Line Total Value"] = subtotal + item["IGST Amount"]
                     
                     # Try to extract line total directly
-                    total_pattern = r'(\d+(?:,\d+)*(?:\.\d+)?)$'
-                    total_match = re.search(total_pattern, line)
+                    total_match = _LINE_TOTAL_RE.search(line)
                     if total_match:
-                        try:
-                            item["Line Total Value"] = float(total_match.group(1).replace(',', ''))
-                        except ValueError:
-                            pass
+                        item["Line Total Value"] = _to_float(total_match.group(1))
                 else:
                     # Simplified parsing for fewer columns
                     item["Item/SKU Code"] = parts[0] if parts else ""
                     item["Item Description"] = parts[1] if len(parts) > 1 else ""
-                    item["Quantity"] = float(re.sub(r'[^\d.]', '', parts[2])) if len(parts) > 2 and parts[2] else 0
+                    item["Quantity"] = float(_NON_NUMERIC_RE.sub('', parts[2])) if len(parts) > 2 and parts[2] else 0
                     
                     # Try to extract rate from the next part
                     if len(parts) > 3:
                         try:
-                            item["Unit Price"] = float(re.sub(r'[^\d.]', '', parts[3]))
+                            item["Unit Price"] = float(_NON_NUMERIC_RE.sub('', parts[3]))
                         except ValueError:
                             pass
                     
                     # Try to find tax rate
-                    tax_pattern = r'(\d+(?:\.\d+)?)%'
-                    tax_match = re.search(tax_pattern, line)
+                    tax_match = _TAX_RATE_RE.search(line)
                     if tax_match:
                         tax_rate = float(tax_match.group(1))
                         item["Tax Rate"] = f"GST_{int(tax_rate)}" if tax_rate.is_integer() else f"GST_{tax_rate}"
                         item["IGST Rate"] = f"{tax_rate}%"
             
             except Exception as e:
-                print(f"Error parsing line item: {str(e)}")
+                # Report failures once after the loop rather than once per line
+                failed_lines += 1
+                last_error = e
                 continue
             
             item_data.append(item)
         
+        if failed_lines:
+            print(f"Error parsing {failed_lines} line item(s): {str(last_error)}")
+        
         # If no items were found, try alternate parsing
         if not item_data:
             # Look for specific patterns in the text
-            sku_pattern = r"([A-Z0-9]+_[A-Z0-9]+)"
-            hsn_pattern = r"(\d{8})"
-            qty_pattern = r"(\d+)\s*(?:PCS|EA|NOS)"
-            
-            sku_matches = re.findall(sku_pattern, self.text)
-            hsn_matches = re.findall(hsn_pattern, self.text)
-            qty_matches = re.findall(qty_pattern, self.text)
+            sku_matches = _SKU_RE.findall(self.text)
+            hsn_matches = _HSN_RE.findall(self.text)
+            qty_matches = _QUANTITY_RE.findall(self.text)
             
             if sku_matches:
                 for i, sku in enumerate(sku_matches[:5]):  # Limit to first 5 as fallback
-                    item = {
-                        "Invoice Serial Number": self.serial_number,
-                        "Invoice Number": invoice_number,
-                        "Line #": i + 1,
-                        "PO Identifier": "",
-                        "Item/SKU Code": sku,
-                        "Item Description": "",
-                        "HSN Code": hsn_matches[i] if i < len(hsn_matches) else "",
-                        "Quantity": float(qty_matches[i]) if i < len(qty_matches) else 0,
-                        "UOM": "PCS",
-                        "Unit Price": 0.0,
-                        "Discount": 0.0,
-                        "Tax Rate": "GST_5",  # Default based on sample
-                        "CGST Rate": "",
-                        "SGST Rate": "",
-                        "IGST Rate": "5.00%",  # Default based on sample
-                        "CGST Amount": 0.0,
-                        "SGST Amount": 0.0,
-                        "IGST Amount": 0.0,
-                        "Line Total Value": 0.0
-                    }
+                    item = _ITEM_TEMPLATE.copy()
+                    item["Invoice Serial Number"] = self.serial_number
+                    item["Invoice Number"] = invoice_number
+                    item["Line #"] = i + 1
+                    item["Item/SKU Code"] = sku
+                    item["HSN Code"] = hsn_matches[i] if i < len(hsn_matches) else ""
+                    item["Quantity"] = float(qty_matches[i]) if i < len(qty_matches) else 0
+                    item["UOM"] = "PCS"
+                    item["Tax Rate"] = "GST_5"  # Default based on sample
+                    item["IGST Rate"] = "5.00%"  # Default based on sample
                     item_data.append(item)
         
         return item_data
     
     def _extract_amount_in_words(self) -> str:
         """Extract amount in words from the text."""
-        patterns = [
-            r"Amount\s*(?:in|In)\s*Words\s*:\s*(.*?)(?:\n|$)",
-            r"(?:Rupees|Rs\.?)\s*(.*?)(?:Only|only)(?:\n|$)",
-            r"Total\s*in\s*words\s*:\s*(.*?)(?:\n|$)"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, self.text, re.IGNORECASE | re.DOTALL)
+        for pattern in _AMOUNT_IN_WORDS_PATS:
+            match = pattern.search(self.text)
             if match:
                 words = match.group(1).strip()
                 # Clean up the text
-                words = re.sub(r'\s+', ' ', words)
+                words = _WHITESPACE_RE.sub(' ', words)
                 if "only" not in words.lower():
                     words += " Only"
                 return words
@@ -461,16 +530,14 @@ class InvoiceParser:
     
     def _extract_irn_number(self) -> str:
         """Extract IRN number from the text."""
-        irn_pattern = r"IRN\s*:?\s*([a-fA-F0-9]{64})"
-        match = re.search(irn_pattern, self.text)
+        match = _IRN_RE.search(self.text)
         if match:
             return match.group(1).strip()
         return ""
     
     def _extract_eway_bill_number(self) -> str:
         """Extract e-way bill number from the text."""
-        eway_pattern = r"e[-\s]?way\s*bill\s*no\.?:?\s*(\d+)"
-        match = re.search(eway_pattern, self.text, re.IGNORECASE)
+        match = _EWAY_BILL_RE.search(self.text)
         if match:
             return match.group(1).strip()
         return ""
@@ -484,17 +551,22 @@ class InvoiceParser:
         if HAS_DOCLING:
             self.text = self._extract_text_with_docling()
         
-        # If docling failed or is not available, fall back to OCR
+        # If docling failed or is not available, fall back to OCR. Docling has already been
+        # tried at this point, so the OCR path doesn't run it again
         if not self.text:
             self.text = self._extract_text_with_ocr()
+        
+        # Lowercase the text once for case-insensitive keyword checks, and drop
+        # GSTIN and substring positions found in any previously parsed text
+        self._text_lower = self.text.lower()
+        self._gstin_hits = None
+        self._pos_cache = {}
             
         # If we still don't have text, log an error
         if not self.text:
             print("WARNING: Failed to extract any text from the PDF!")
         else:
             print(f"Successfully extracted {len(self.text)} characters of text")
-            # Print first 200 chars for debugging
-            print(f"First 200 characters: {self.text[:200]}")
         
         # Extract invoice-level data
         document_type = self._extract_document_type()
@@ -507,9 +579,9 @@ class InvoiceParser:
         consignee_name = self._extract_entity_name(["Consignee", "Ship to", "Delivered to"]) or buyer_name
         
         # Extract GSTIN
-        supplier_gstin = self._extract_gstin("Supplier|Seller|From|GSTIN")
-        buyer_gstin = self._extract_gstin("Buyer|Customer|Bill to|GSTIN")
-        consignee_gstin = self._extract_gstin("Consignee|Ship to|GSTIN") or buyer_gstin
+        supplier_gstin = self._extract_gstin("supplier")
+        buyer_gstin = self._extract_gstin("buyer")
+        consignee_gstin = self._extract_gstin("consignee") or buyer_gstin
         
         # Extract addresses
         supplier_address = self._extract_address(supplier_name)
@@ -517,9 +589,10 @@ class InvoiceParser:
         consignee_address = self._extract_address(consignee_name) or buyer_address
         
         # Extract numeric values
-        total_quantity = self._extract_numeric_value("Total Qty|Quantity")
-        subtotal = self._extract_numeric_value("Sub\s*Total|Taxable\s*Value|Assessable\s*Value")
-        total_invoice_value = self._extract_numeric_value("Total\s*Amount|Grand\s*Total|Invoice\s*Value")
+        numeric_values = self._extract_numeric_values()
+        total_quantity = numeric_values["quantity"]
+        subtotal = numeric_values["subtotal"]
+        total_invoice_value = numeric_values["total"]
         
         # Extract tax amounts
         cgst, sgst, igst, cess = self._extract_tax_amounts()
@@ -574,4 +647,19 @@ class InvoiceParser:
         # Extract item-level data
         item_data = self._extract_line_items(invoice_number)
         
-        return invoice_data, item_data 
\ No newline at end of file
+        return invoice_data, item_data 
+    
+    @classmethod
+    def parse_many(cls, pdf_paths: List[str], workers: Optional[int] = None) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Parse several PDFs in parallel, one document per worker process.
+        
+        Args:
+            pdf_paths: Paths to the PDF files
+            workers: Number of worker processes, defaults to the number of CPUs
+            
+        Returns:
+            List of (invoice_data, item_data) tuples in the same order as pdf_paths
+        """
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_parse_worker) as executor:
+            return list(executor.map(partial(_parse_invoice, cls), pdf_paths))
@@ -0,0 +1,120 @@
+import os
+import json
+import threading
+from typing import Any, Optional
+
+# Optional dependencies for the semantic cache
+try:
+    import numpy as np
+    import faiss
+    from sentence_transformers import SentenceTransformer
+    HAS_SEMANTIC_CACHE = True
+except ImportError:
+    HAS_SEMANTIC_CACHE = False
+
+# Location of the persisted index and payloads; can be overridden with SEMANTIC_CACHE_DIR
+SEMANTIC_CACHE_DIR = os.environ.get("SEMANTIC_CACHE_DIR", "cache/semantic")
+
+# Sentence embedding model used to embed invoice text
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# Minimum cosine similarity for two invoice texts to be considered near-duplicates
+SIMILARITY_THRESHOLD = 0.95
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache of LLM responses keyed by an embedding of the invoice text.
+    Invoices from the same supplier usually differ only in a few fields (invoice number, date),
+    so a near-identical text can reuse a previous response instead of calling the LLM again.
+    """
+
+    def __init__(self, cache_dir: str = SEMANTIC_CACHE_DIR, threshold: float = SIMILARITY_THRESHOLD):
+        if not HAS_SEMANTIC_CACHE:
+            raise ImportError("Semantic cache requires numpy, faiss and sentence-transformers.")
+
+        self.cache_dir = cache_dir
+        self.threshold = threshold
+        self.index_path = os.path.join(cache_dir, "index.faiss")
+        self.payloads_path = os.path.join(cache_dir, "payloads.json")
+        self._lock = threading.Lock()
+
+        self.model = SentenceTransformer(EMBEDDING_MODEL)
+        dimension = self.model.get_sentence_embedding_dimension()
+
+        # Load the persisted index and payloads if present
+        if os.path.exists(self.index_path) and os.path.exists(self.payloads_path):
+            self.index = faiss.read_index(self.index_path)
+            with open(self.payloads_path, 'r', encoding='utf-8') as f:
+                self.payloads = json.load(f)
+        else:
+            self.index = faiss.IndexFlatIP(dimension)
+            self.payloads = []
+
+    def _embed(self, text: str):
+        """Embed text as a normalized float32 row vector, so inner product equals cosine similarity."""
+        vector = self.model.encode([text], normalize_embeddings=True)
+        return np.asarray(vector, dtype="float32")
+
+    def lookup(self, text: str) -> Optional[Any]:
+        """
+        Find the cached payload for the most similar text.
+
+        Args:
+            text: Extracted invoice text
+
+        Returns:
+            The cached payload if its similarity is above the threshold, otherwise None
+        """
+        with self._lock:
+            if self.index.ntotal == 0:
+                return None
+
+            scores, ids = self.index.search(self._embed(text), 1)
+            score, idx = float(scores[0][0]), int(ids[0][0])
+            if idx < 0 or score < self.threshold:
+                return None
+
+            print(f"Semantic cache hit with similarity {score:.3f}")
+            return self.payloads[idx]
+
+    def add(self, text: str, payload: Any):
+        """
+        Add a payload to the cache and persist it to disk.
+
+        Args:
+            text: Extracted invoice text
+            payload: JSON-serializable value to store
+        """
+        with self._lock:
+            try:
+                self.index.add(self._embed(text))
+                self.payloads.append(payload)
+
+                os.makedirs(self.cache_dir, exist_ok=True)
+                faiss.write_index(self.index, self.index_path)
+                with open(self.payloads_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.payloads, f)
+            except Exception as e:
+                print(f"Error updating semantic cache: {str(e)}")
+
+
+_semantic_cache = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Get the process-wide semantic cache, loading the embedding model on first use."""
+    global _semantic_cache
+    if not HAS_SEMANTIC_CACHE:
+        return None
+
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            try:
+                _semantic_cache = SemanticCache()
+            except Exception as e:
+                # Don't retry loading the model on every call
+                print(f"Error initializing semantic cache: {str(e)}")
+                _semantic_cache = False
+        return _semantic_cache or None
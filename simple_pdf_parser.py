@@ -1,12 +1,206 @@
+import io
 import os
 import re
 import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
 from typing import Dict, List, Tuple, Any, Optional
 import PyPDF2
-import pytesseract
 from pdf2image import convert_from_path
 from PIL import Image
 
+# tesserocr calls the Tesseract library in-process, avoiding a tesseract subprocess and temporary
+# image files for every page
+try:
+    from tesserocr import PyTessBaseAPI
+    HAS_TESSEROCR = True
+except ImportError:
+    HAS_TESSEROCR = False
+
+# pytesseract is used as fallback when tesserocr is not installed
+try:
+    import pytesseract
+    HAS_PYTESSERACT = True
+except ImportError:
+    HAS_PYTESSERACT = False
+
+# Number of pages OCR'd at the same time. Tesseract releases the GIL while recognizing a page,
+# so pages are recognized in parallel; can be overridden with the OCR_CONCURRENCY environment variable
+OCR_CONCURRENCY = int(os.environ.get("OCR_CONCURRENCY", os.cpu_count() or 1))
+
+# A page counts as born-digital when PyPDF2 extracts at least this many characters from it, and a
+# document counts as born-digital, with no need for OCR, when this fraction of its pages do
+MIN_PAGE_TEXT_CHARS = 20
+BORN_DIGITAL_PAGE_RATIO = 0.8
+
+# Minimum page count for extracting PyPDF2 text in worker processes. PyPDF2 extracts a text page in
+# about 1.6 ms, while starting a worker costs about 3 ms with fork and about 90 ms with spawn or
+# forkserver, so on 4 cores the pool only pays for itself from about 75 pages; invoices are far shorter
+PYPDF_PARALLEL_MIN_PAGES = 80
+
+# Set in the worker processes of SimplePDFParser.parse_many, which already run one document per
+# core, so they extract pages in-process instead of starting a nested pool
+_in_parse_worker = False
+
+# Document types to look for, with their lowercase form for case-insensitive matching
+_DOC_TYPES = [(doc_type, doc_type.lower()) for doc_type in ("Tax Invoice", "Delivery Challan", "Stock Transfer")]
+
+# Precompiled regex patterns, each with the flags its search used
+# GSTIN pattern: 2 digits, 5 letters, 4 digits, 1 letter, 1 alphanumeric, Z, 1 alphanumeric
+_GSTIN = r"[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1}"
+_GSTIN_RE = re.compile(rf"({_GSTIN})")
+_SUPPLIER_GSTIN_PATS = [
+    re.compile(rf"{label}\s*GSTIN\s*:?\s*({_GSTIN})", re.IGNORECASE) for label in ("Supplier", "Seller", "From")
+]
+_BUYER_GSTIN_PATS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        rf"Buyer\s*GSTIN\s*:?\s*({_GSTIN})",
+        rf"Customer\s*GSTIN\s*:?\s*({_GSTIN})",
+        rf"GST\s*No\.?:?\s*({_GSTIN})",
+        rf"Consignee\s*GSTIN\s*:?\s*({_GSTIN})"
+    )
+]
+_GSTIN_CONTEXT_CHARS_RE = re.compile(r"[A-Za-z |]+")
+_GSTIN_LABEL_RE = re.compile(rf"GSTIN\s*:?\s*({_GSTIN})", re.IGNORECASE)
+
+_INVOICE_NUMBER_PATS = [
+    re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+        r"Document\s*No\s*:?\s*([A-Za-z0-9/\-_]+)",
+        r"Invoice\s*No\.?\s*:?\s*([A-Za-z0-9/\-_]+)",
+        r"Invoice\s*Number\s*:?\s*([A-Za-z0-9/\-_]+)",
+        r"Bill\s*No\.?\s*:?\s*([A-Za-z0-9/\-_]+)",
+        r"(Mensa/[A-Z]{2}/[A-Z]{3}/\d+)",
+    )
+]
+_DATE_PATS = [
+    re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+        r"Invoice\s*Date\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})",
+        r"Date\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})",
+        r"Date\s*:\s*(\d{1,2}[A-Za-z]{3}\d{2,4})",
+        r"Invoice\s*Date\s*:?\s*(\d{1,2}[A-Za-z]{3}\d{2,4})",
+    )
+]
+_ANY_DATE_RE = re.compile(r"(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})", re.IGNORECASE | re.DOTALL)
+
+# Labels of the total invoice value, most specific first
+_TOTAL_LABELS = (
+    r"Total\s*Invoice\s*Value\s*(?:in\s*INR)?",
+    r"Total\s*Amount",
+    r"Grand\s*Total",
+    r"Total\s*Value",
+    r"Total"
+)
+_TOTAL_PATS_DECIMAL = [
+    re.compile(rf"{label}\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)", re.IGNORECASE) for label in _TOTAL_LABELS
+]
+_TOTAL_PATS_NO_DECIMAL = [
+    re.compile(rf"{label}\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+)", re.IGNORECASE) for label in _TOTAL_LABELS
+]
+_TOTAL_IN_WORDS_RE = re.compile(r"(?:Rupees|INR)\s*(?:in\s*Words)?:?\s*(.+?)(?:Only|only|\.|\n)", re.IGNORECASE)
+_NON_NUMERIC_RE = re.compile(r'[^\d.]')
+
+_NAME_RE = re.compile(r"(?:Legal|Trade)?\s*Name\s*:?\s*([^\n]+)", re.IGNORECASE)
+_ADDRESS_RE = re.compile(r"Address\s*(?:1|2|Line)?\s*:?\s*([^\n]+)", re.IGNORECASE)
+_TAX_ID_RE = re.compile(r'GSTIN|GST No|PAN', re.IGNORECASE)
+_LEADING_COLONS_RE = re.compile(r'^[:\s]+')
+_LEGAL_NAME_RE = re.compile(r"Legal\s*Name\s*:?\s*([^\n]+)", re.IGNORECASE)
+
+_TOTAL_QUANTITY_RE = re.compile(r"Total\s*(?:Qty|Quantity)[^0-9]*(\d[\d,.]*)", re.IGNORECASE)
+_SUBTOTAL_RE = re.compile(r"(?:Sub\s*Total|Taxable\s*Value|Assessable\s*Value)[^0-9]*(\d[\d,.]*)", re.IGNORECASE)
+_CGST_RE = re.compile(r"CGST[^0-9]*(\d[\d,.]*)", re.IGNORECASE)
+_SGST_RE = re.compile(r"SGST[^0-9]*(\d[\d,.]*)", re.IGNORECASE)
+_IGST_RE = re.compile(r"IGST[^0-9]*(\d[\d,.]*)", re.IGNORECASE)
+_CESS_RE = re.compile(r"CESS[^0-9]*(\d[\d,.]*)", re.IGNORECASE)
+# Quantity, subtotal and tax amounts, followed by the total invoice value patterns in order of preference.
+# Every one of them starts with one of the labels of _SUMMARY_LABEL_RE, so they can only match there
+_SUMMARY_PATS = [
+    _TOTAL_QUANTITY_RE, _SUBTOTAL_RE, _CGST_RE, _SGST_RE, _IGST_RE, _CESS_RE
+] + _TOTAL_PATS_DECIMAL + _TOTAL_PATS_NO_DECIMAL
+_SUMMARY_LABEL_RE = re.compile(r"(?=Total|Grand|Sub|Taxable|Assessable|CGST|SGST|IGST|CESS)", re.IGNORECASE)
+_IRN_RE = re.compile(r"IRN\s*:?\s*([a-fA-F0-9]{64})", re.IGNORECASE | re.DOTALL)
+_EWAY_BILL_RE = re.compile(r"e[-\s]?way\s*bill\s*no\.?:?\s*(\d+)", re.IGNORECASE | re.DOTALL)
+_AMOUNT_IN_WORDS_RE = re.compile(
+    r"(?:Amount\s*(?:in|In)\s*Words|Total\s*in\s*words)\s*:\s*(.*?)(?:\n|$)", re.IGNORECASE | re.DOTALL
+)
+_RUPEES_ONLY_RE = re.compile(r"(?:Rupees|Rs\.?)\s*(.*?)(?:Only|only)(?:\n|$)", re.IGNORECASE | re.DOTALL)
+
+_TABLE_RE = re.compile(
+    r"(?:S\.?No\.?|Sr\.?\s*No\.?|Item Code|HSN|Description|Qty|Rate|Amount).*?(?=Total|Grand Total|Sub Total)",
+    re.IGNORECASE | re.DOTALL
+)
+_TABLE_HEADER_RE = re.compile(r"(S\.?No\.?|Sr\.?\s*No\.?|Item Code|HSN|Description|Qty|Rate|Amount)$", re.IGNORECASE)
+_SKU_RE = re.compile(r"\b([A-Z0-9]+(?:_[A-Z0-9]+)*)\b")
+_HSN_RE = re.compile(r"\b(\d{4,8})\b")
+_QTY_UOM_RE = re.compile(r"\b(\d+(?:\.\d+)?)\s*(?:PCS|EA|NOS|KG|GM|MT|LT)\b", re.IGNORECASE)
+_UOM_RE = re.compile(r"\b(PCS|EA|NOS|KG|GM|MT|LT)\b", re.IGNORECASE)
+_UNIT_PRICE_RE = re.compile(r"\b(\d+(?:,\d+)*(?:\.\d+)?)\s*(?=\s*\b(?:PER|PCS|EA|NOS|KG|GM|MT|LT)\b)", re.IGNORECASE)
+_AMOUNT_TAIL_RE = re.compile(r"\b(\d+(?:,\d+)*(?:\.\d+)?)\s*$")
+_TAX_RATE_RE = re.compile(r"(\d+(?:\.\d+)?)%")
+
+# Patterns for the fallback that looks for item-like lines anywhere in the text
+_ITEM_HEADER_RE = re.compile(r"(S\.?No\.?|Sr\.?\s*No\.?|Item Code|Description)$", re.IGNORECASE)
+_ITEM_CODE_RE = re.compile(r"\b[A-Z0-9_-]{6,}\b")
+_ITEM_QTY_UOM_RE = re.compile(r"\b(\d+(?:\.\d+)?)\s*(?:PCS|NOS|EA|KG)\b", re.IGNORECASE)
+_ITEM_QTY_HINT_RE = re.compile(r"\b\d+\s*(?:PCS|NOS|EA|KG)\b", re.IGNORECASE)
+_ITEM_UOM_RE = re.compile(r"\b(PCS|NOS|EA|KG)\b", re.IGNORECASE)
+_ITEM_SKU_RE = re.compile(r"\b([A-Z0-9]+(?:[_-][A-Z0-9]+)*)\b")
+_AMOUNT_RE = re.compile(r"\b(\d+(?:,\d+)*(?:\.\d+)?)\b")
+
+
+def _open_pdf_reader(pdf_path: str) -> PyPDF2.PdfReader:
+    """
+    Open a PDF with PyPDF2 from an in-memory copy of the file. PyPDF2 does many small reads and
+    seeks while parsing, which then hit memory instead of the file.
+    """
+    with open(pdf_path, 'rb') as file:
+        return PyPDF2.PdfReader(io.BytesIO(file.read()))
+
+
+def _extract_pages_text(pdf_path: str, page_numbers: range) -> List[str]:
+    """Extract the text of a range of pages with PyPDF2. Defined at module level so it can run in a worker process."""
+    pdf_reader = _open_pdf_reader(pdf_path)
+    return [pdf_reader.pages[page_num].extract_text() for page_num in page_numbers]
+
+
+def _init_parse_worker():
+    """Set up a parse_many worker process: no nested page pools and one math library thread."""
+    global _in_parse_worker
+    _in_parse_worker = True
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+
+def _parse_invoice(parser_cls, pdf_path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Parse a single PDF in a worker process. Defined at module level so it can be pickled."""
+    return parser_cls(pdf_path).parse()
+
+
+@lru_cache(maxsize=64)
+def _gstin_context_re(context: str):
+    """
+    Compile the search for a GSTIN following the given context pattern, once per context.
+    The context is interpolated into the regex, so only labels joined with "|" are accepted.
+    """
+    if not _GSTIN_CONTEXT_CHARS_RE.fullmatch(context):
+        raise ValueError(f"Invalid GSTIN context: {context!r}")
+    return re.compile(rf"{context}.*?({_GSTIN})", re.IGNORECASE | re.DOTALL)
+
+
+def _description_re(sku_code: str, hsn_code: str, quantity: str, uom: str):
+    """
+    Build the search for an item description between the SKU code and the HSN code, quantity or UOM of
+    a line. The values are escaped, so a quantity such as "1.5" only matches literally and metacharacters
+    in a code can't break the pattern. The pattern differs per line (the SKU is unique), so it isn't cached.
+    """
+    sku_code, hsn_code, quantity, uom = (re.escape(value) for value in (sku_code, hsn_code, quantity, uom))
+    return re.compile(rf"{sku_code}\s+(.*?)(?:\b{hsn_code}\b|\b{quantity}\b|\b{uom}\b)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _section_re(keyword: str):
+    """Compile the search for the section of text that starts with a party keyword, once per keyword."""
+    return re.compile(rf"(?:{keyword}|Details of {keyword}).*?(?:GSTIN|PAN|\n\s*\n)", re.IGNORECASE | re.DOTALL)
+
+
 class SimplePDFParser:
     """
     A simpler PDF parser that uses PyPDF2 to extract text from PDFs.
@@ -16,85 +210,163 @@ class SimplePDFParser:
     def __init__(self, pdf_path: str):
         self.pdf_path = pdf_path
         self.text = ""
+        self._text_lower = ""
+        self._text_upper = ""
+        self._search_cache = {}
+        self._gstins = None
+        self._lines = []
         self.serial_number = str(uuid.uuid4())
     
-    def _extract_text_with_pypdf(self) -> str:
-        """Extract text from PDF using PyPDF2."""
+    def _extract_text_with_pypdf(self) -> List[str]:
+        """Extract the text of each page of the PDF using PyPDF2."""
         try:
             print(f"Extracting text from {self.pdf_path} using PyPDF2...")
-            text = ""
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
+            pdf_reader = _open_pdf_reader(self.pdf_path)
+            page_count = len(pdf_reader.pages)
+            workers = min(os.cpu_count() or 1, page_count)
+            if page_count < PYPDF_PARALLEL_MIN_PAGES or workers < 2 or _in_parse_worker:
+                page_texts = [page.extract_text() for page in pdf_reader.pages]
+            else:
+                # Pages are parsed independently, so split them into one contiguous range per worker;
+                # each worker opens its own reader and map keeps the ranges in page order
+                size = -(-page_count // workers)
+                page_ranges = [range(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+                with ProcessPoolExecutor(max_workers=len(page_ranges)) as executor:
+                    page_texts = [
+                        page_text
+                        for range_texts in executor.map(partial(_extract_pages_text, self.pdf_path), page_ranges)
+                        for page_text in range_texts
+                    ]
             
-            print(f"Successfully extracted {len(text)} characters of text with PyPDF2")
-            return text
+            print(f"Successfully extracted {sum(len(page_text) + 1 for page_text in page_texts)} characters of text with PyPDF2")
+            return page_texts
         except Exception as e:
             print(f"Error in PyPDF2 extraction: {str(e)}")
-            return ""
+            return []
     
-    def _extract_text_with_ocr(self) -> str:
-        """Extract text from PDF using pytesseract OCR."""
+    def _extract_text_with_ocr(self, page_numbers: Optional[List[int]] = None) -> List[str]:
+        """
+        Extract the text of pages of the PDF using tesserocr, or pytesseract if tesserocr is not installed.
+        
+        Args:
+            page_numbers: Sorted zero-based numbers of the pages to OCR, or None for all pages
+            
+        Returns:
+            List of page texts, one per requested page, or an empty list if OCR failed
+        """
+        if not HAS_TESSEROCR and not HAS_PYTESSERACT:
+            print("No OCR method available")
+            return []
+        
         try:
-            print(f"Extracting text from {self.pdf_path} using pytesseract OCR...")
-            images = convert_from_path(self.pdf_path)
-            text = ""
+            engine = "tesserocr" if HAS_TESSEROCR else "pytesseract"
+            print(f"Extracting text from {self.pdf_path} using {engine} OCR...")
+            # Render grayscale pages, tesseract doesn't use the color planes
+            if page_numbers is None:
+                images = convert_from_path(self.pdf_path, grayscale=True)
+            else:
+                # Render only the requested pages, one pdftoppm call per run of consecutive pages
+                images = []
+                run_start = 0
+                for i in range(1, len(page_numbers) + 1):
+                    if i == len(page_numbers) or page_numbers[i] != page_numbers[i - 1] + 1:
+                        images.extend(convert_from_path(
+                            self.pdf_path,
+                            first_page=page_numbers[run_start] + 1,
+                            last_page=page_numbers[i - 1] + 1,
+                            grayscale=True
+                        ))
+                        run_start = i
+            workers = max(1, min(OCR_CONCURRENCY, len(images)))
+            page_texts = [""] * len(images)
             
-            for i, image in enumerate(images):
-                print(f"Processing page {i+1}/{len(images)}...")
-                page_text = pytesseract.image_to_string(image)
-                text += page_text + "\n"
+            if HAS_TESSEROCR:
+                def ocr_pages(offset: int):
+                    # A tesserocr API isn't thread-safe, so each worker initializes its own once
+                    # and reuses it for every page it handles
+                    with PyTessBaseAPI() as api:
+                        for i in range(offset, len(images), workers):
+                            print(f"Processing page {i+1}/{len(images)}...")
+                            api.SetImage(images[i])
+                            page_texts[i] = api.GetUTF8Text()
+                
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    list(executor.map(ocr_pages, range(workers)))
+            else:
+                def ocr_page(i: int) -> str:
+                    print(f"Processing page {i+1}/{len(images)}...")
+                    return pytesseract.image_to_string(images[i])
+                
+                # Pages are independent, so run several tesseract processes at once; map keeps page order
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    page_texts = list(executor.map(ocr_page, range(len(images))))
             
-            print(f"Successfully extracted {len(text)} characters of text with OCR")
-            return text
+            print(f"Successfully extracted {sum(len(page_text) + 1 for page_text in page_texts)} characters of text with OCR")
+            return page_texts
         except Exception as e:
             print(f"Error in OCR extraction: {str(e)}")
-            return ""
+            return []
+    
+    def _is_born_digital(self, page_texts: List[str]) -> bool:
+        """
+        Check whether a PDF has a text layer on most pages, so OCR would not find more text.
+        
+        Args:
+            page_texts: Text extracted from each page with PyPDF2
+            
+        Returns:
+            True if at least BORN_DIGITAL_PAGE_RATIO of the pages have MIN_PAGE_TEXT_CHARS characters of text
+        """
+        if not page_texts:
+            return False
+        digital_pages = sum(1 for page_text in page_texts if len(page_text.strip()) >= MIN_PAGE_TEXT_CHARS)
+        return digital_pages >= BORN_DIGITAL_PAGE_RATIO * len(page_texts)
     
     def extract_text(self) -> str:
         """
         Extract text from PDF using PyPDF2, falling back to OCR if needed.
         """
         # First try PyPDF2
-        text = self._extract_text_with_pypdf()
+        page_texts = self._extract_text_with_pypdf()
         
-        # If PyPDF2 failed or didn't extract enough text, try OCR
-        if len(text.strip()) < 100:
+        # If PyPDF2 didn't find a text layer on most pages, OCR the pages it got little or no text
+        # from, keeping the text it did extract from the others
+        if not self._is_born_digital(page_texts):
             print("Not enough text extracted with PyPDF2, trying OCR...")
-            ocr_text = self._extract_text_with_ocr()
-            if len(ocr_text.strip()) > len(text.strip()):
-                text = ocr_text
+            if page_texts:
+                page_numbers = [
+                    i for i, page_text in enumerate(page_texts) if len(page_text.strip()) < MIN_PAGE_TEXT_CHARS
+                ]
+                ocr_texts = self._extract_text_with_ocr(page_numbers)
+                for page_num, ocr_text in zip(page_numbers, ocr_texts):
+                    if len(ocr_text.strip()) > len(page_texts[page_num].strip()):
+                        page_texts[page_num] = ocr_text
+            else:
+                # PyPDF2 couldn't read the document at all, so OCR every page
+                page_texts = self._extract_text_with_ocr()
+        
+        text = "".join(page_text + "\n" for page_text in page_texts)
         
         self.text = text
         return text
     
-    def _extract_with_pattern(self, pattern: str, default: str = "") -> str:
-        """Extract data using regex pattern."""
-        match = re.search(pattern, self.text, re.IGNORECASE | re.DOTALL)
+    def _extract_with_pattern(self, pattern: re.Pattern, default: str = "") -> str:
+        """Extract data using a precompiled regex pattern."""
+        match = pattern.search(self.text)
         if match and match.groups():
             return match.group(1).strip()
         return default
     
     def _extract_document_type(self) -> str:
         """Extract document type from the text."""
-        for doc_type in ["Tax Invoice", "Delivery Challan", "Stock Transfer"]:
-            if doc_type.lower() in self.text.lower():
+        for doc_type, doc_type_lower in _DOC_TYPES:
+            if doc_type_lower in self._text_lower:
                 return doc_type
         return "Tax Invoice"  # Default
     
     def _extract_invoice_number(self) -> str:
         """Extract invoice number from the text."""
-        patterns = [
-            r"Document\s*No\s*:?\s*([A-Za-z0-9/\-_]+)",
-            r"Invoice\s*No\.?\s*:?\s*([A-Za-z0-9/\-_]+)",
-            r"Invoice\s*Number\s*:?\s*([A-Za-z0-9/\-_]+)",
-            r"Bill\s*No\.?\s*:?\s*([A-Za-z0-9/\-_]+)",
-            r"(Mensa/[A-Z]{2}/[A-Z]{3}/\d+)",
-        ]
-        
-        for pattern in patterns:
+        for pattern in _INVOICE_NUMBER_PATS:
             value = self._extract_with_pattern(pattern)
             if value:
                 return value
@@ -103,50 +375,34 @@ class SimplePDFParser:
     
     def _extract_date(self) -> str:
         """Extract invoice date from the text."""
-        patterns = [
-            r"Invoice\s*Date\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})",
-            r"Date\s*:\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})",
-            r"Date\s*:\s*(\d{1,2}[A-Za-z]{3}\d{2,4})",
-            r"Invoice\s*Date\s*:?\s*(\d{1,2}[A-Za-z]{3}\d{2,4})",
-        ]
-        
-        for pattern in patterns:
+        for pattern in _DATE_PATS:
             value = self._extract_with_pattern(pattern)
             if value:
                 return value
         
         # Try to find date in format dd-mm-yyyy
-        date_pattern = r"(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})"
-        return self._extract_with_pattern(date_pattern)
+        return self._extract_with_pattern(_ANY_DATE_RE)
+    
+    def _search(self, pattern: re.Pattern) -> Optional[re.Match]:
+        """Search the text with a precompiled pattern, remembering the result for the rest of the parse."""
+        if pattern not in self._search_cache:
+            self._search_cache[pattern] = pattern.search(self.text)
+        return self._search_cache[pattern]
     
     def _extract_gstin(self, context: str) -> str:
         """Extract GSTIN based on context."""
-        # GSTIN pattern: 2 digits, 5 letters, 4 digits, 1 letter, 1 alphanumeric, Z, 1 alphanumeric
-        gstin_pattern = r"([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})"
-        
         # If context is for supplier, look specifically for supplier GSTIN
         if any(word in context for word in ["Supplier", "Seller", "From"]):
-            supplier_patterns = [
-                r"Supplier\s*GSTIN\s*:?\s*([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})",
-                r"Seller\s*GSTIN\s*:?\s*([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})",
-                r"From\s*GSTIN\s*:?\s*([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})"
-            ]
-            for pattern in supplier_patterns:
-                match = re.search(pattern, self.text, re.IGNORECASE)
+            for pattern in _SUPPLIER_GSTIN_PATS:
+                match = self._search(pattern)
                 if match and match.groups():
                     result = match.group(1)
                     return result.strip() if result else ""
         
         # If context is for buyer/customer/consignee, look specifically for those GSTINs
         if any(word in context for word in ["Buyer", "Customer", "Bill to", "Ship to", "Consignee"]):
-            buyer_patterns = [
-                r"Buyer\s*GSTIN\s*:?\s*([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})",
-                r"Customer\s*GSTIN\s*:?\s*([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})",
-                r"GST\s*No\.?:?\s*([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})",
-                r"Consignee\s*GSTIN\s*:?\s*([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})"
-            ]
-            for pattern in buyer_patterns:
-                match = re.search(pattern, self.text, re.IGNORECASE)
+            for pattern in _BUYER_GSTIN_PATS:
+                match = self._search(pattern)
                 if match and match.groups():
                     result = match.group(1)
                     return result.strip() if result else ""
@@ -154,8 +410,7 @@ class SimplePDFParser:
         # Try to find GSTIN with context
         try:
             # Look for context followed by GSTIN
-            context_pattern = rf"{context}.*?{gstin_pattern}"
-            match = re.search(context_pattern, self.text, re.IGNORECASE | re.DOTALL)
+            match = _gstin_context_re(context).search(self.text)
             if match and match.groups():
                 result = match.group(1)
                 return result.strip() if result else ""
@@ -163,17 +418,18 @@ class SimplePDFParser:
             # If not found, try searching without regex context
             if "GSTIN" in context:
                 # Look for "GSTIN: XXXXXXXXXXXX" pattern
-                gstin_simple = r"GSTIN\s*:?\s*([0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{1}[Z]{1}[0-9A-Z]{1})"
-                match = re.search(gstin_simple, self.text, re.IGNORECASE)
+                match = self._search(_GSTIN_LABEL_RE)
                 if match and match.groups():
                     result = match.group(1)
                     return result.strip() if result else ""
         except Exception as e:
             print(f"Error in GSTIN extraction with context: {str(e)}")
         
-        # If not found with context, look for all GSTINs
+        # If not found with context, look for all GSTINs, found once per document for all parties
         try:
-            matches = re.findall(gstin_pattern, self.text)
+            if self._gstins is None:
+                self._gstins = _GSTIN_RE.findall(self.text)
+            matches = self._gstins
             if matches and len(matches) > 0:
                 # For supplier GSTIN, prefer first match
                 if any(word in context for word in ["Supplier", "Seller", "From"]) and len(matches) > 0:
@@ -199,8 +455,7 @@ class SimplePDFParser:
         # Try to find sections with these keywords
         section_text = ""
         for keyword in keywords:
-            pattern = rf"(?:{keyword}|Details of {keyword}).*?(?:GSTIN|PAN|\n\s*\n)"
-            match = re.search(pattern, self.text, re.IGNORECASE | re.DOTALL)
+            match = _section_re(keyword).search(self.text)
             if match:
                 section_text = match.group(0)
                 break
@@ -210,7 +465,7 @@ class SimplePDFParser:
             lines = [line.strip() for line in section_text.split('\n') if line.strip()]
             
             # Look for Legal Name or Name patterns
-            name_match = re.search(r"(?:Legal|Trade)?\s*Name\s*:?\s*([^\n]+)", section_text, re.IGNORECASE)
+            name_match = _NAME_RE.search(section_text)
             if name_match:
                 name = name_match.group(1).strip()
             elif lines and len(lines) > 0:
@@ -221,7 +476,7 @@ class SimplePDFParser:
                         break
             
             # Try to extract address parts
-            address_match = re.search(r"Address\s*(?:1|2|Line)?\s*:?\s*([^\n]+)", section_text, re.IGNORECASE)
+            address_match = _ADDRESS_RE.search(section_text)
             if address_match:
                 address = address_match.group(1).strip()
             else:
@@ -232,61 +487,69 @@ class SimplePDFParser:
                     if not found_name and name in line:
                         found_name = True
                         continue
-                    if found_name and not re.search(r'GSTIN|GST No|PAN', line, re.IGNORECASE):
+                    if found_name and not _TAX_ID_RE.search(line):
                         address_lines.append(line)
-                    elif found_name and re.search(r'GSTIN|GST No|PAN', line, re.IGNORECASE):
+                    elif found_name and _TAX_ID_RE.search(line):
                         break
                 
                 address = ", ".join(address_lines)
         
         # Clean up name and address
-        name = re.sub(r'^[:\s]+', '', name)  # Remove leading colons or spaces
+        name = _LEADING_COLONS_RE.sub('', name)  # Remove leading colons or spaces
         
         return name, address
     
-    def _extract_numeric_value(self, pattern: str) -> float:
-        """Extract numeric value based on pattern."""
-        match = re.search(pattern, self.text, re.IGNORECASE)
+    def _find_first_matches(self, patterns: List[re.Pattern]) -> List[Optional[re.Match]]:
+        """
+        Find the first match of each summary pattern in a single pass over the text.
+        The patterns are only tried at positions where a summary label starts, which gives the same
+        result as searching the whole text with each of them.
+        
+        Args:
+            patterns: Patterns that each start with one of the labels of _SUMMARY_LABEL_RE
+            
+        Returns:
+            The first match of each pattern, or None if it doesn't match
+        """
+        matches = [None] * len(patterns)
+        pending = list(range(len(patterns)))
+        for label in _SUMMARY_LABEL_RE.finditer(self.text):
+            position = label.start()
+            for index in pending:
+                matches[index] = patterns[index].match(self.text, position)
+            pending = [index for index in pending if matches[index] is None]
+            if not pending:
+                break
+        return matches
+    
+    def _numeric_value(self, match: Optional[re.Match]) -> float:
+        """Convert the number captured by a match to a float."""
         if match:
             # Extract the matched number and remove any commas
-            number_str = re.sub(r'[^\d.]', '', match.group(1))
+            number_str = _NON_NUMERIC_RE.sub('', match.group(1))
             try:
                 return float(number_str)
             except ValueError:
                 pass
         return 0.0
     
-    def _extract_total_invoice_value(self) -> float:
-        """Extract the total invoice value using multiple patterns."""
-        patterns = [
-            r"Total\s*Invoice\s*Value\s*(?:in\s*INR)?\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)",
-            r"Total\s*Amount\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)",
-            r"Grand\s*Total\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)",
-            r"Total\s*Value\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)",
-            r"Total\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+\.\d+)"
-        ]
-        
-        for pattern in patterns:
-            value = self._extract_numeric_value(pattern)
-            if value > 0:
-                return value
+    def _extract_total_invoice_value(self, total_matches: List[Optional[re.Match]]) -> float:
+        """
+        Extract the total invoice value.
         
-        # If we couldn't find with decimal, try without
-        patterns_no_decimal = [
-            r"Total\s*Invoice\s*Value\s*(?:in\s*INR)?\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+)",
-            r"Total\s*Amount\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+)",
-            r"Grand\s*Total\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+)",
-            r"Total\s*Value\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+)",
-            r"Total\s*:?\s*(?:₹|Rs\.?)?\s*(\d[\d,.]+)"
-        ]
-        
-        for pattern in patterns_no_decimal:
-            value = self._extract_numeric_value(pattern)
+        Args:
+            total_matches: First matches of the total value patterns with decimals, then without
+            
+        Returns:
+            The first positive total found, in order of the patterns
+        """
+        for match in total_matches:
+            value = self._numeric_value(match)
             if value > 0:
                 return value
                 
         # If still not found, try to extract it from the "in words" section
-        words_match = re.search(r"(?:Rupees|INR)\s*(?:in\s*Words)?:?\s*(.+?)(?:Only|only|\.|\n)", self.text, re.IGNORECASE)
+        words_match = _TOTAL_IN_WORDS_RE.search(self.text)
         if words_match:
             words = words_match.group(1).strip()
             if "lakh" in words.lower() or "lac" in words.lower():
@@ -311,6 +574,16 @@ class SimplePDFParser:
             # Print first 200 chars for debugging
             print(f"First 200 characters: {self.text[:200]}")
         
+        # Case-fold the text once for the case-insensitive keyword checks, and drop
+        # GSTIN search results from any previously parsed text
+        self._text_lower = self.text.lower()
+        self._text_upper = self.text.upper()
+        self._search_cache = {}
+        self._gstins = None
+        
+        # Split the text into lines once for the company name lookup and the line-item fallback
+        self._lines = self.text.split('\n')
+        
         # Extract invoice-level data
         document_type = self._extract_document_type()
         invoice_number = self._extract_invoice_number()
@@ -318,7 +591,7 @@ class SimplePDFParser:
         
         # Look for the company name in the first few lines of the document
         company_name = ""
-        first_lines = self.text.split('\n')[:10]  # Consider first 10 lines
+        first_lines = self._lines[:10]  # Consider first 10 lines
         for line in first_lines:
             line = line.strip()
             # Skip headers like "TAX INVOICE"
@@ -343,7 +616,7 @@ class SimplePDFParser:
         
         # Look for Legal Name in the text if buyer name not found
         if not buyer_name:
-            legal_name_match = re.search(r"Legal\s*Name\s*:?\s*([^\n]+)", self.text, re.IGNORECASE)
+            legal_name_match = _LEGAL_NAME_RE.search(self.text)
             if legal_name_match:
                 buyer_name = legal_name_match.group(1).strip()
         
@@ -357,27 +630,21 @@ class SimplePDFParser:
             consignee_address = buyer_address
             consignee_gstin = buyer_gstin
         
-        # Extract total quantity
-        total_quantity = self._extract_numeric_value(r"Total\s*(?:Qty|Quantity)[^0-9]*(\d[\d,.]*)")
-        
-        # Extract values
-        subtotal = self._extract_numeric_value(r"(?:Sub\s*Total|Taxable\s*Value|Assessable\s*Value)[^0-9]*(\d[\d,.]*)")
-        cgst = self._extract_numeric_value(r"CGST[^0-9]*(\d[\d,.]*)")
-        sgst = self._extract_numeric_value(r"SGST[^0-9]*(\d[\d,.]*)")
-        igst = self._extract_numeric_value(r"IGST[^0-9]*(\d[\d,.]*)")
-        cess = self._extract_numeric_value(r"CESS[^0-9]*(\d[\d,.]*)")
-        
-        # Use improved method to extract total invoice value
-        total_invoice_value = self._extract_total_invoice_value()
+        # Extract total quantity, values and total invoice value in one pass over the text
+        summary_matches = self._find_first_matches(_SUMMARY_PATS)
+        total_quantity, subtotal, cgst, sgst, igst, cess = (
+            self._numeric_value(match) for match in summary_matches[:6]
+        )
+        total_invoice_value = self._extract_total_invoice_value(summary_matches[6:])
         
         # Extract IRN and E-Way Bill numbers
-        irn_no = self._extract_with_pattern(r"IRN\s*:?\s*([a-fA-F0-9]{64})")
-        eway_bill_no = self._extract_with_pattern(r"e[-\s]?way\s*bill\s*no\.?:?\s*(\d+)")
+        irn_no = self._extract_with_pattern(_IRN_RE)
+        eway_bill_no = self._extract_with_pattern(_EWAY_BILL_RE)
         
         # Extract amount in words
-        amount_in_words = self._extract_with_pattern(r"(?:Amount\s*(?:in|In)\s*Words|Total\s*in\s*words)\s*:\s*(.*?)(?:\n|$)")
+        amount_in_words = self._extract_with_pattern(_AMOUNT_IN_WORDS_RE)
         if not amount_in_words:
-            amount_in_words = self._extract_with_pattern(r"(?:Rupees|Rs\.?)\s*(.*?)(?:Only|only)(?:\n|$)")
+            amount_in_words = self._extract_with_pattern(_RUPEES_ONLY_RE)
         
         # Create invoice-level data dictionary
         invoice_data = {
@@ -423,8 +690,7 @@ class SimplePDFParser:
         item_data = []
         
         # Try to find the item table section
-        table_pattern = r"(?:S\.?No\.?|Sr\.?\s*No\.?|Item Code|HSN|Description|Qty|Rate|Amount).*?(?=Total|Grand Total|Sub Total)"
-        table_match = re.search(table_pattern, self.text, re.IGNORECASE | re.DOTALL)
+        table_match = _TABLE_RE.search(self.text)
         
         if table_match:
             table_text = table_match.group(0)
@@ -434,33 +700,38 @@ class SimplePDFParser:
             item_lines = []
             for line in lines:
                 line = line.strip()
-                if not line or re.search(r"(S\.?No\.?|Sr\.?\s*No\.?|Item Code|HSN|Description|Qty|Rate|Amount)$", line, re.IGNORECASE):
+                if not line or _TABLE_HEADER_RE.search(line):
                     continue
                 item_lines.append(line)
             
+            # Which tax types the invoice mentions is the same for every line
+            has_cgst = "CGST" in self._text_upper
+            has_sgst = "SGST" in self._text_upper
+            has_igst = "IGST" in self._text_upper
+            
             # Simple parsing: look for SKU codes and patterns
             for i, line in enumerate(item_lines):
                 # Look for item code pattern (often in uppercase with numbers)
-                sku_match = re.search(r"\b([A-Z0-9]+(?:_[A-Z0-9]+)*)\b", line)
+                sku_match = _SKU_RE.search(line)
                 sku_code = sku_match.group(1) if sku_match else ""
                 
                 # Look for HSN code (8 digits usually)
-                hsn_match = re.search(r"\b(\d{4,8})\b", line)
+                hsn_match = _HSN_RE.search(line)
                 hsn_code = hsn_match.group(1) if hsn_match else ""
                 
                 # Look for quantity and units
-                qty_match = re.search(r"\b(\d+(?:\.\d+)?)\s*(?:PCS|EA|NOS|KG|GM|MT|LT)\b", line, re.IGNORECASE)
+                qty_match = _QTY_UOM_RE.search(line)
                 quantity = float(qty_match.group(1)) if qty_match else 1.0  # Default to 1 if not found
                 
                 # Determine UOM
-                uom_match = re.search(r"\b(PCS|EA|NOS|KG|GM|MT|LT)\b", line, re.IGNORECASE) 
+                uom_match = _UOM_RE.search(line)
                 uom = uom_match.group(1).upper() if uom_match else "PCS"  # Default unit of measure
                 
                 # Look for price/amount (numbers often at the end of the line)
-                price_match = re.search(r"\b(\d+(?:,\d+)*(?:\.\d+)?)\s*(?=\s*\b(?:PER|PCS|EA|NOS|KG|GM|MT|LT)\b)", line, re.IGNORECASE)
+                price_match = _UNIT_PRICE_RE.search(line)
                 unit_price = float(price_match.group(1).replace(',', '')) if price_match else 0.0
                 
-                amount_match = re.search(r"\b(\d+(?:,\d+)*(?:\.\d+)?)\s*$", line)
+                amount_match = _AMOUNT_TAIL_RE.search(line)
                 line_total = float(amount_match.group(1).replace(',', '')) if amount_match else 0.0
                 
                 # If we have a total but no unit price, and we have quantity, calculate unit price
@@ -468,20 +739,24 @@ class SimplePDFParser:
                     unit_price = line_total / quantity
                 
                 # Look for tax rate
-                tax_match = re.search(r"(\d+(?:\.\d+)?)%", line)
+                tax_match = _TAX_RATE_RE.search(line)
                 tax_rate = float(tax_match.group(1)) if tax_match else 0.0
                 
+                # Format the full and half rates once, for the tax rate and the per-tax rates
+                rate = f"{tax_rate}%" if tax_rate > 0 else ""
+                half_rate = f"{tax_rate/2}%" if tax_rate > 0 else ""
+                
                 # Determine CGST, SGST, IGST based on context
-                cgst_rate = f"{tax_rate/2}%" if "CGST" in self.text.upper() and tax_rate > 0 else ""
-                sgst_rate = f"{tax_rate/2}%" if "SGST" in self.text.upper() and tax_rate > 0 else ""
-                igst_rate = f"{tax_rate}%" if "IGST" in self.text.upper() and tax_rate > 0 else ""
+                cgst_rate = half_rate if has_cgst else ""
+                sgst_rate = half_rate if has_sgst else ""
+                igst_rate = rate if has_igst else ""
                 
                 # If tax_rate is present but no specific tax type is identified, default to IGST
                 if tax_rate > 0 and not cgst_rate and not sgst_rate and not igst_rate:
-                    igst_rate = f"{tax_rate}%"
+                    igst_rate = rate
                 
                 # Extract item description - often between SKU code and quantity/price
-                desc_match = re.search(rf"{sku_code}\s+(.*?)(?:\b{hsn_code}\b|\b{quantity}\b|\b{uom}\b)", line, re.IGNORECASE)
+                desc_match = _description_re(sku_code, hsn_code, str(quantity), uom).search(line)
                 description = desc_match.group(1).strip() if desc_match and desc_match.groups() else ""
                 
                 # If we can't extract a proper description, use the whole line
@@ -501,7 +776,7 @@ class SimplePDFParser:
                     "UOM": uom,
                     "Unit Price": unit_price,
                     "Discount": 0.0,
-                    "Tax Rate": f"{tax_rate}%" if tax_rate > 0 else "",
+                    "Tax Rate": rate,
                     "CGST Rate": cgst_rate,
                     "SGST Rate": sgst_rate,
                     "IGST Rate": igst_rate,
@@ -516,33 +791,31 @@ class SimplePDFParser:
         if not item_data:
             # Find lines that look like items (contain product codes, quantities, and amounts)
             potential_item_lines = []
-            lines = self.text.split('\n')
-            
-            for line in lines:
+            for line in self._lines:
                 line = line.strip()
                 # Skip short lines or ones that are likely headers
-                if len(line) < 10 or re.search(r"(S\.?No\.?|Sr\.?\s*No\.?|Item Code|Description)$", line, re.IGNORECASE):
+                if len(line) < 10 or _ITEM_HEADER_RE.search(line):
                     continue
                     
                 # Check if line contains patterns that suggest it's an item line
-                if (re.search(r"\b[A-Z0-9_-]{6,}\b", line) and 
-                    (re.search(r"\b\d+\s*(?:PCS|NOS|EA|KG)\b", line, re.IGNORECASE) or 
-                     re.search(r"\b\d+(?:,\d+)*(?:\.\d+)?\b", line))):
+                if (_ITEM_CODE_RE.search(line) and 
+                    (_ITEM_QTY_HINT_RE.search(line) or 
+                     _AMOUNT_RE.search(line))):
                     potential_item_lines.append(line)
             
             # Process the potential item lines
             for i, line in enumerate(potential_item_lines):
-                sku_match = re.search(r"\b([A-Z0-9]+(?:[_-][A-Z0-9]+)*)\b", line)
+                sku_match = _ITEM_SKU_RE.search(line)
                 sku_code = sku_match.group(1) if sku_match else f"ITEM{i+1}"
                 
-                qty_match = re.search(r"\b(\d+(?:\.\d+)?)\s*(?:PCS|NOS|EA|KG)\b", line, re.IGNORECASE)
+                qty_match = _ITEM_QTY_UOM_RE.search(line)
                 quantity = float(qty_match.group(1)) if qty_match else 1.0
                 
-                uom_match = re.search(r"\b(PCS|NOS|EA|KG)\b", line, re.IGNORECASE)
+                uom_match = _ITEM_UOM_RE.search(line)
                 uom = uom_match.group(1).upper() if uom_match else "PCS"
                 
                 # Look for numeric values that could be amounts
-                amount_matches = re.findall(r"\b(\d+(?:,\d+)*(?:\.\d+)?)\b", line)
+                amount_matches = _AMOUNT_RE.findall(line)
                 amount_values = [float(val.replace(',', '')) for val in amount_matches if val]
                 
                 # Last value is likely the line total
@@ -572,4 +845,20 @@ class SimplePDFParser:
                 }
                 item_data.append(item)
         
-        return item_data 
\ No newline at end of file
+        return item_data 
+    
+    @classmethod
+    def parse_many(cls, pdf_paths: List[str], workers: Optional[int] = None) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Parse several PDFs in parallel, one document per worker process.
+        Documents are parsed independently, with no state shared between them.
+        
+        Args:
+            pdf_paths: Paths to the PDF files
+            workers: Number of worker processes, defaults to the number of CPUs
+            
+        Returns:
+            List of (invoice_data, item_data) tuples in the same order as pdf_paths
+        """
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_parse_worker) as executor:
+            return list(executor.map(partial(_parse_invoice, cls), pdf_paths))
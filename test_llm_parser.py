@@ -6,9 +6,10 @@ This script will parse a sample invoice PDF and save the extracted data to CSV f
 
 import os
 import sys
+import glob
+import asyncio
 import argparse
-from llm_pdf_parser import LLMPDFParser
-from utils import save_to_csv, save_items_to_csv, ensure_directories
+from utils import save_items_to_csv, ensure_directories, run_parser_test
 
 def parse_arguments():
     """Parse command-line arguments."""
@@ -17,15 +18,74 @@ def parse_arguments():
                         help="LLM provider to use (default: google)")
     parser.add_argument("--input", "-i", default="MyTest/input/Mensa_KA_BLR_830 (1).pdf",
                         help="Path to the input PDF file")
+    parser.add_argument("--input-dir", "-d", default=None,
+                        help="Parse every PDF in this directory concurrently instead of a single file")
+    parser.add_argument("--concurrency", "-c", type=int, default=None,
+                        help="Maximum number of concurrent LLM requests with --input-dir (default: llm_pdf_parser.MAX_CONCURRENT_LLM_CALLS)")
     parser.add_argument("--output-dir", "-o", default="MyTest/output",
                         help="Directory to save output CSV files")
+    parser.add_argument("--semantic-cache", action="store_true",
+                        help="Reuse the LLM response of a near-identical invoice (requires faiss and sentence-transformers)")
+    parser.add_argument("--batch", action="store_true",
+                        help="With --input-dir and the OpenAI provider, submit all invoices as one OpenAI Batch API job "
+                             "(half the cost, but results can take up to 24 hours)")
     return parser.parse_args()
 
+def parse_directory(args, api_key, openai_api_key):
+    """Parse all PDFs in a directory concurrently and save the combined results to CSV files."""
+    from llm_pdf_parser import parse_many, submit_batch, MAX_CONCURRENT_LLM_CALLS
+    
+    concurrency = args.concurrency or MAX_CONCURRENT_LLM_CALLS
+    pdf_paths = sorted(glob.glob(os.path.join(args.input_dir, "*.pdf")))
+    if not pdf_paths:
+        print(f"Error: No PDF files found in {args.input_dir}")
+        sys.exit(1)
+    
+    if args.batch:
+        print(f"Submitting {len(pdf_paths)} invoices from {args.input_dir} as an OpenAI batch")
+        results = submit_batch(pdf_paths, openai_api_key=openai_api_key)
+    else:
+        print(f"Parsing {len(pdf_paths)} invoices from {args.input_dir} with up to {concurrency} concurrent LLM requests")
+        results = asyncio.run(parse_many(
+            pdf_paths,
+            max_concurrent_llm_calls=concurrency,
+            api_key=api_key,
+            llm_provider=args.provider,
+            openai_api_key=openai_api_key,
+            use_semantic_cache=args.semantic_cache
+        ))
+    
+    # Save all invoices and all line items to one CSV file each
+    invoice_rows = [invoice_data for invoice_data, _ in results]
+    item_rows = [item for _, item_data in results for item in item_data]
+    
+    provider_prefix = "google" if args.provider == "google" else "openai"
+    invoice_csv = f"{args.output_dir}/{provider_prefix}_invoice_level.csv"
+    item_csv = f"{args.output_dir}/{provider_prefix}_item_level.csv"
+    
+    # Invoices that failed to parse have fewer fields, so use the union of all keys as headers
+    save_items_to_csv(invoice_rows, invoice_csv, list(dict.fromkeys(key for row in invoice_rows for key in row)))
+    save_items_to_csv(item_rows, item_csv)
+    
+    print(f"\nInvoice-level data saved to: {invoice_csv}")
+    print(f"Item-level data saved to: {item_csv}")
+    print(f"Found {len(item_rows)} line items in {len(invoice_rows)} invoices")
+
 def main():
     """Main function to test the LLM PDF parser."""
     # Parse command-line arguments
     args = parse_arguments()
     
+    # OCR runs several tesseract processes at once, so limit each of them to one thread
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    
+    # Import the parser (and its pandas/PDF dependencies) only after the arguments are parsed, so --help is instant
+    from llm_pdf_parser import LLMPDFParser
+    
+    if args.batch and (args.provider != "openai" or not args.input_dir):
+        print("Error: --batch requires --provider openai and --input-dir")
+        sys.exit(1)
+    
     # Set the LLM provider
     llm_provider = args.provider
     print(f"Using {llm_provider.capitalize()} as the LLM provider")
@@ -48,60 +108,26 @@ def main():
             sys.exit(1)
     
     # Ensure output directories exist
-    ensure_directories()
-    os.makedirs(args.output_dir, exist_ok=True)
-    
-    # Get the sample PDF path
-    sample_pdf = args.input
-    if not os.path.exists(sample_pdf):
-        print(f"Error: Sample PDF not found at {sample_pdf}")
-        sys.exit(1)
-    
-    print(f"Parsing sample invoice: {sample_pdf}")
+    ensure_directories(args.output_dir)
     
-    # Initialize parser and parse PDF with the specified provider
-    parser = LLMPDFParser(
-        pdf_path=sample_pdf,
-        api_key=api_key,
-        llm_provider=llm_provider,
-        openai_api_key=openai_api_key
-    )
-    invoice_data, item_data = parser.parse()
-    
-    # Print the raw text extracted for debugging
-    print("\nExtracted text sample (first 500 chars):")
-    print(parser.text[:500])
-    print("..." if len(parser.text) > 500 else "")
+    if args.input_dir:
+        parse_directory(args, api_key, openai_api_key)
+        return
     
-    # Save data to CSV files
+    # Parse the PDF with the specified provider, save the results and print a summary
     provider_prefix = "google" if llm_provider == "google" else "openai"
-    invoice_csv = f"{args.output_dir}/{provider_prefix}_invoice_level.csv"
-    item_csv = f"{args.output_dir}/{provider_prefix}_item_level.csv"
-    
-    save_to_csv(invoice_data, invoice_csv)
-    save_items_to_csv(item_data, item_csv)
-    
-    print(f"\nInvoice-level data saved to: {invoice_csv}")
-    print(f"Item-level data saved to: {item_csv}")
-    print(f"Found {len(item_data)} line items")
-    
-    # Print some sample data
-    print("\nInvoice Summary:")
-    print(f"Document Type: {invoice_data['Document Type']}")
-    print(f"Invoice Number: {invoice_data['Invoice/Document Number']}")
-    print(f"Invoice Date: {invoice_data['Invoice/Document Date']}")
-    print(f"Supplier: {invoice_data['Supplier Name']}")
-    print(f"Buyer: {invoice_data['Buyer Name']}")
-    print(f"Total Value: {invoice_data['Total Invoice Value']}")
-    
-    if item_data:
-        print("\nFirst Item:")
-        first_item = item_data[0]
-        print(f"SKU: {first_item['Item/SKU Code']}")
-        print(f"Quantity: {first_item['Quantity']}")
-        print(f"Unit Price: {first_item['Unit Price']}")
-        print(f"Tax Rate: {first_item['Tax Rate']}")
-        print(f"Line Total: {first_item['Line Total Value']}")
+    run_parser_test(
+        lambda pdf_path: LLMPDFParser(
+            pdf_path=pdf_path,
+            api_key=api_key,
+            llm_provider=llm_provider,
+            openai_api_key=openai_api_key,
+            use_semantic_cache=args.semantic_cache
+        ),
+        args.input,
+        args.output_dir,
+        provider_prefix
+    )
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -9,8 +9,22 @@ import sys
 import argparse
 import requests
 import json
+import hashlib
+import llm_cache
 
-def test_openai_api():
+# How long a successful connection test is reused before the API is called again (1 hour)
+CONNECTION_TEST_TTL = 3600
+
+# Keep-alive session, so further calls from this process reuse the TLS connection
+SESSION = requests.Session()
+
+def _connection_test_cache_key(api_key: str, data: dict) -> str:
+    """Build the cache key from a hash of the API key and the request body, so a new key is always tested."""
+    key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    payload = f"openai-connection-test|{key_hash}|{json.dumps(data, sort_keys=True)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def test_openai_api(use_cache=True):
     # Get API key from environment variable
     api_key = os.environ.get("OPENAI_API_KEY")
     
@@ -36,16 +50,27 @@ def test_openai_api():
         "max_tokens": 50
     }
     
+    # Reuse a recent successful response for the same key and request
+    cache_key = _connection_test_cache_key(api_key, data)
+    cached = llm_cache.get(cache_key) if use_cache else None
+    if cached is not None:
+        print("✅ OpenAI API connection successful! (cached result, use --no-cache to re-test)")
+        print(f"Response: {cached['choices'][0]['message']['content']}")
+        return True
+    
     try:
-        response = requests.post(
+        response = SESSION.post(
             "https://api.openai.com/v1/chat/completions",
             headers=headers,
-            json=data
+            json=data,
+            timeout=30
         )
         
         if response.status_code == 200:
+            result = response.json()
+            llm_cache.set(cache_key, result, ttl=CONNECTION_TEST_TTL)
             print("✅ OpenAI API connection successful!")
-            print(f"Response: {response.json()['choices'][0]['message']['content']}")
+            print(f"Response: {result['choices'][0]['message']['content']}")
             return True
         else:
             print(f"❌ OpenAI API connection failed with status code: {response.status_code}")
@@ -56,9 +81,17 @@ def test_openai_api():
         print(f"❌ Error connecting to OpenAI API: {str(e)}")
         return False
 
+def parse_arguments():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Test the OpenAI API key and connection")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always call the API instead of reusing a recent successful test")
+    return parser.parse_args()
+
 def main():
+    args = parse_arguments()
     print("Testing OpenAI API integration...")
-    success = test_openai_api()
+    success = test_openai_api(use_cache=not args.no_cache)
     if success:
         print("\nYour OpenAI API key is valid and working!")
         print("You can now use the LLM PDF Parser with the OpenAI provider.")
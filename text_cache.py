@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from typing import List, Optional
+from utils import compute_file_hash
+
+# Location of the on-disk cache; can be overridden with the TEXT_CACHE_PATH environment variable
+CACHE_PATH = os.environ.get("TEXT_CACHE_PATH", "cache/text_cache.db")
+
+# Time-to-live for cached page texts (7 days); expired documents are deleted when new ones are stored,
+# so the database doesn't grow without bound or keep document text indefinitely
+DEFAULT_TTL = 7 * 86400
+
+# Number of recently used documents also kept in memory, so re-parsing a file in the same
+# process skips the database lookup and JSON decoding
+MEMORY_CACHE_SIZE = 256
+
+_memory_cache = OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the cache database, creating it if needed."""
+    cache_dir = os.path.dirname(CACHE_PATH)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    conn = sqlite3.connect(CACHE_PATH, timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS page_text ("
+        "key TEXT PRIMARY KEY, pages TEXT NOT NULL, expires_at REAL NOT NULL)"
+    )
+    return conn
+
+
+def _content_key(pdf_path: str, variant: str, content_hash: Optional[str]) -> str:
+    """
+    Build a cache key from the SHA-256 of the file's contents and the extraction variant.
+    Keying by contents rather than path lets uploads saved under one-off temporary names share entries.
+    """
+    return f"{content_hash or compute_file_hash(pdf_path)}|{variant}"
+
+
+def _remember(key: str, pages: List[str], expires_at: float):
+    """Store pages in the in-memory cache, evicting the least recently used document if it is full."""
+    with _memory_cache_lock:
+        _memory_cache[key] = (pages, expires_at)
+        _memory_cache.move_to_end(key)
+        if len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def get(pdf_path: str, variant: str = "", content_hash: Optional[str] = None) -> Optional[List[str]]:
+    """
+    Get the cached page texts of a PDF.
+
+    Args:
+        pdf_path: Path to the PDF file
+        variant: Extraction settings the text depends on (e.g. the OCR resolution)
+        content_hash: SHA-256 of the file contents, computed from the file if not given
+
+    Returns:
+        List of page texts, or None if the contents are not cached or the entry has expired
+    """
+    try:
+        key = _content_key(pdf_path, variant, content_hash)
+        now = time.time()
+        with _memory_cache_lock:
+            entry = _memory_cache.get(key)
+            if entry is not None and entry[1] >= now:
+                _memory_cache.move_to_end(key)
+                return list(entry[0])
+
+        with closing(_connect()) as conn:
+            row = conn.execute(
+                "SELECT pages, expires_at FROM page_text WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < now:
+            return None
+
+        pages = json.loads(row[0])
+        _remember(key, pages, row[1])
+        return list(pages)
+    except (OSError, sqlite3.Error, ValueError) as e:
+        print(f"Error reading text cache: {str(e)}")
+        return None
+
+
+def set(pdf_path: str, pages: List[str], variant: str = "", content_hash: Optional[str] = None,
+        ttl: int = DEFAULT_TTL):
+    """
+    Store the page texts of a PDF in the cache, and delete expired entries.
+
+    Args:
+        pdf_path: Path to the PDF file
+        pages: List of page texts
+        variant: Extraction settings the text depends on (e.g. the OCR resolution)
+        content_hash: SHA-256 of the file contents, computed from the file if not given
+        ttl: Time-to-live in seconds
+    """
+    try:
+        key = _content_key(pdf_path, variant, content_hash)
+        now = time.time()
+        _remember(key, list(pages), now + ttl)
+        with closing(_connect()) as conn:
+            with conn:
+                conn.execute("DELETE FROM page_text WHERE expires_at < ?", (now,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO page_text (key, pages, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(pages), now + ttl)
+                )
+    except (OSError, sqlite3.Error, TypeError, ValueError) as e:
+        print(f"Error writing text cache: {str(e)}")
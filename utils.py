@@ -1,16 +1,70 @@
 import os
+import sys
 import csv
-import pandas as pd
-from typing import Dict, List, Any
+import hashlib
+import operator
+from typing import Dict, List, Any, Callable, Optional, Tuple, TYPE_CHECKING
 
+# pandas is only needed for type annotations; importing it would add a noticeable startup cost
+# to every script that uses these helpers
+if TYPE_CHECKING:
+    import pandas as pd
 
-def ensure_directories():
-    """Ensure all required directories exist."""
-    os.makedirs("temp", exist_ok=True)
-    os.makedirs("output", exist_ok=True)
+# Allow Parquet/Feather output when pyarrow is installed
+try:
+    import pyarrow as pa
+    import pyarrow.feather as pa_feather
+    import pyarrow.parquet as pa_parquet
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+# Columns of item-level CSV files, in order
+ITEM_HEADERS = (
+    "Invoice Serial Number", "Invoice Number", "Line #", "PO Identifier",
+    "Item/SKU Code", "Item Description", "HSN Code", "Quantity", "UOM",
+    "Unit Price", "Discount", "Tax Rate", "CGST Rate", "SGST Rate",
+    "IGST Rate", "CGST Amount", "SGST Amount", "IGST Amount", "Line Total Value"
+)
+
+# Directories already created by ensure_directories in this process
+_ensured_directories = set()
+
+
+def ensure_directories(*extra_dirs: str):
+    """
+    Ensure all required directories exist. Directories are only created once per process,
+    so calling this repeatedly (e.g. once per invoice) doesn't hit the filesystem again.
+    
+    Args:
+        *extra_dirs: Additional directories to create besides temp and output
+    """
+    for directory in ("temp", "output") + extra_dirs:
+        if directory not in _ensured_directories:
+            os.makedirs(directory, exist_ok=True)
+            _ensured_directories.add(directory)
     
 
-def save_to_csv(data: Dict[str, Any], filepath: str, headers: List[str] = None):
+def compute_file_hash(filepath: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 hash of a file's contents.
+    
+    Args:
+        filepath: Path to the file
+        chunk_size: Number of bytes read at a time
+        
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_to_csv(data: Dict[str, Any], filepath: str, headers: List[str] = None, append: bool = False):
     """
     Save dictionary data to a CSV file.
     
@@ -18,7 +72,17 @@ def save_to_csv(data: Dict[str, Any], filepath: str, headers: List[str] = None):
         data: Dictionary containing data to save
         filepath: Path to save the CSV file
         headers: Optional list of headers. If None, uses data keys as headers.
+        append: If True and the file already has content, add the row to the end of it
+                without rewriting the header, so many invoices can be collected in one file
     """
+    if append and os.path.exists(filepath) and os.path.getsize(filepath) > 0:
+        # Keep the column order of the existing file
+        headers = headers or get_csv_headers(filepath)
+        with open(filepath, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=headers)
+            writer.writerow(data)
+        return
+    
     headers = headers or list(data.keys())
     
     with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
@@ -27,6 +91,40 @@ def save_to_csv(data: Dict[str, Any], filepath: str, headers: List[str] = None):
         writer.writerow(data)
 
 
+def _format_plain_csv(items: List[Dict[str, Any]], headers: List[str]) -> Optional[str]:
+    """
+    Format rows as CSV by joining their values directly, for the common case where no value needs quoting.
+    The output is the same as csv.DictWriter's.
+    
+    Args:
+        items: List of dictionaries containing data to format
+        headers: Column headers, in order
+        
+    Returns:
+        The CSV text, or None if a value needs quoting or an item's keys don't match the headers
+    """
+    # A single empty field is quoted by the csv module, so leave one-column files to it
+    if len(headers) < 2:
+        return None
+    
+    getter = operator.itemgetter(*headers)
+    separators = len(headers) - 1
+    lines = []
+    for row in [headers] + [getter(item) if len(item) == len(headers) else None for item in items]:
+        if row is None:
+            return None
+        # The csv module writes None as an empty field and floats with repr()
+        line = ",".join(
+            "" if value is None else repr(value) if isinstance(value, float) else str(value) for value in row
+        )
+        if line.count(",") != separators or '"' in line or '\n' in line or '\r' in line:
+            return None
+        lines.append(line)
+    
+    lines.append("")
+    return "\r\n".join(lines)
+
+
 def save_items_to_csv(items: List[Dict[str, Any]], filepath: str, headers: List[str] = None):
     """
     Save a list of dictionaries to a CSV file.
@@ -38,10 +136,7 @@ def save_items_to_csv(items: List[Dict[str, Any]], filepath: str, headers: List[
     """
     if not items:
         # Create empty file with headers
-        headers = headers or ["Invoice Serial Number", "Invoice Number", "Line #", "PO Identifier",
-                             "Item/SKU Code", "Item Description", "HSN Code", "Quantity", "UOM",
-                             "Unit Price", "Discount", "Tax Rate", "CGST Rate", "SGST Rate",
-                             "IGST Rate", "CGST Amount", "SGST Amount", "IGST Amount", "Line Total Value"]
+        headers = headers or ITEM_HEADERS
         
         with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=headers)
@@ -50,13 +145,27 @@ def save_items_to_csv(items: List[Dict[str, Any]], filepath: str, headers: List[
     
     headers = headers or list(items[0].keys())
     
+    # pyarrow's CSV writer isn't used here: even with quoting_style="needed" it quotes every string
+    # and the header and writes 1.0 as 1 and True as true, so the file format would depend on
+    # whether pyarrow is installed
+    
+    # Without values that need quoting, format all rows directly and write them at once
+    try:
+        content = _format_plain_csv(items, headers)
+    except KeyError:
+        content = None
+    if content is not None:
+        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+            csvfile.write(content)
+        return
+    
     with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=headers)
         writer.writeheader()
         writer.writerows(items)
 
 
-def save_dataframe_to_csv(df: pd.DataFrame, filepath: str):
+def save_dataframe_to_csv(df: "pd.DataFrame", filepath: str):
     """
     Save a pandas DataFrame to a CSV file.
     
@@ -67,6 +176,87 @@ def save_dataframe_to_csv(df: pd.DataFrame, filepath: str):
     df.to_csv(filepath, index=False, encoding='utf-8')
 
 
+def _items_to_table(items: List[Dict[str, Any]], headers: List[str] = None) -> "pa.Table":
+    """
+    Convert a list of dictionaries to an Arrow table.
+    
+    Args:
+        items: List of dictionaries containing data to convert
+        headers: Optional list of columns, in order. If None, uses keys from first item,
+                 or ITEM_HEADERS if there are no items.
+        
+    Returns:
+        Arrow table with one column per header
+    """
+    headers = headers or (list(items[0].keys()) if items else ITEM_HEADERS)
+    
+    columns = {}
+    for h in headers:
+        values = [item.get(h) for item in items]
+        try:
+            columns[h] = pa.array(values) if items else pa.array([], type=pa.string())
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # A column mixing numbers and strings (e.g. "" for a missing amount) can't be typed, store it as strings
+            columns[h] = pa.array([None if value is None else str(value) for value in values], type=pa.string())
+    return pa.table(columns)
+
+
+def save_to_parquet(data: Dict[str, Any], filepath: str, headers: List[str] = None):
+    """
+    Save dictionary data to a Parquet file.
+    
+    Args:
+        data: Dictionary containing data to save
+        filepath: Path to save the Parquet file
+        headers: Optional list of headers. If None, uses data keys as headers.
+    """
+    save_items_to_parquet([data], filepath, headers)
+
+
+def save_items_to_parquet(items: List[Dict[str, Any]], filepath: str, headers: List[str] = None):
+    """
+    Save a list of dictionaries to a zstd-compressed Parquet file.
+    
+    Args:
+        items: List of dictionaries containing data to save
+        filepath: Path to save the Parquet file
+        headers: Optional list of headers. If None, uses keys from first item as headers.
+    """
+    if not HAS_PYARROW:
+        raise ImportError("Parquet output requires pyarrow.")
+    
+    pa_parquet.write_table(_items_to_table(items, headers), filepath, compression='zstd')
+
+
+def save_items_to_feather(items: List[Dict[str, Any]], filepath: str, headers: List[str] = None):
+    """
+    Save a list of dictionaries to a Feather file.
+    
+    Args:
+        items: List of dictionaries containing data to save
+        filepath: Path to save the Feather file
+        headers: Optional list of headers. If None, uses keys from first item as headers.
+    """
+    if not HAS_PYARROW:
+        raise ImportError("Feather output requires pyarrow.")
+    
+    pa_feather.write_feather(_items_to_table(items, headers), filepath)
+
+
+def save_dataframe_to_feather(df: "pd.DataFrame", filepath: str):
+    """
+    Save a pandas DataFrame to a Feather file.
+    
+    Args:
+        df: DataFrame to save
+        filepath: Path to save the Feather file
+    """
+    if not HAS_PYARROW:
+        raise ImportError("Feather output requires pyarrow.")
+    
+    pa_feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), filepath)
+
+
 def get_csv_headers(csv_path: str) -> List[str]:
     """
     Get headers from a CSV file.
@@ -78,6 +268,96 @@ def get_csv_headers(csv_path: str) -> List[str]:
         List of column headers
     """
     with open(csv_path, 'r', encoding='utf-8') as csvfile:
+        first_line = csvfile.readline()
+        
+        # Unquoted headers (as written by the save functions) can simply be split on commas
+        header_line = first_line.rstrip('\n')
+        if header_line and '"' not in header_line and '\r' not in header_line:
+            return header_line.split(',')
+        
+        csvfile.seek(0)
         reader = csv.reader(csvfile)
         headers = next(reader)
-    return headers 
\ No newline at end of file
+    return headers
+ 
+
+
+def _print_parse_summary(invoice_data: Dict[str, Any], item_data: List[Dict[str, Any]]):
+    """Print the main invoice fields and the first line item."""
+    print("\nInvoice Summary:")
+    print(f"Document Type: {invoice_data['Document Type']}")
+    print(f"Invoice Number: {invoice_data['Invoice/Document Number']}")
+    print(f"Invoice Date: {invoice_data['Invoice/Document Date']}")
+    print(f"Supplier: {invoice_data['Supplier Name']}")
+    print(f"Buyer: {invoice_data['Buyer Name']}")
+    print(f"Total Value: {invoice_data['Total Invoice Value']}")
+    
+    if item_data:
+        print("\nFirst Item:")
+        first_item = item_data[0]
+        print(f"SKU: {first_item['Item/SKU Code']}")
+        print(f"Quantity: {first_item['Quantity']}")
+        print(f"Unit Price: {first_item['Unit Price']}")
+        print(f"Tax Rate: {first_item['Tax Rate']}")
+        print(f"Line Total: {first_item['Line Total Value']}")
+
+
+def run_parser_test(
+    parser_factory: Callable[[str], Any],
+    pdf_path: str,
+    output_dir: str,
+    prefix: str,
+    show_text: bool = True
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Parse a sample invoice, save the results and print a summary, as done by the test_*_parser.py scripts.
+    Exits with status 1 if the PDF doesn't exist.
+    
+    Args:
+        parser_factory: Callable that takes the PDF path and returns a parser with a parse() method
+        pdf_path: Path to the sample PDF
+        output_dir: Directory to save the output files in
+        prefix: Prefix of the output file names, e.g. "simple" for simple_invoice_level.csv
+        show_text: Whether to print the start of the extracted text
+        
+    Returns:
+        Tuple of (invoice_data, item_data)
+    """
+    ensure_directories(output_dir)
+    
+    if not os.path.exists(pdf_path):
+        print(f"Error: Sample PDF not found at {pdf_path}")
+        sys.exit(1)
+    
+    print(f"Parsing sample invoice: {pdf_path}")
+    
+    # Initialize parser and parse PDF
+    parser = parser_factory(pdf_path)
+    invoice_data, item_data = parser.parse()
+    
+    if show_text:
+        # Print the raw text extracted for debugging
+        ellipsis = "..." if len(parser.text) > 500 else ""
+        print(f"\nExtracted text sample (first 500 chars):\n{parser.text[:500]}\n{ellipsis}")
+    
+    # Save data to CSV files
+    invoice_csv = os.path.join(output_dir, f"{prefix}_invoice_level.csv")
+    item_csv = os.path.join(output_dir, f"{prefix}_item_level.csv")
+    
+    save_to_csv(invoice_data, invoice_csv)
+    save_items_to_csv(item_data, item_csv)
+    
+    print(f"\nInvoice-level data saved to: {invoice_csv}")
+    print(f"Item-level data saved to: {item_csv}")
+    print(f"Found {len(item_data)} line items")
+    
+    # Also save Parquet copies for downstream readers when pyarrow is installed
+    if HAS_PYARROW:
+        invoice_parquet = os.path.splitext(invoice_csv)[0] + ".parquet"
+        item_parquet = os.path.splitext(item_csv)[0] + ".parquet"
+        save_to_parquet(invoice_data, invoice_parquet)
+        save_items_to_parquet(item_data, item_parquet)
+        print(f"Parquet copies saved to: {invoice_parquet}, {item_parquet}")
+    
+    _print_parse_summary(invoice_data, item_data)
+    return invoice_data, item_data